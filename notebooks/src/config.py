@@ -7,9 +7,11 @@ FOLDER_DATA_TEAMS = Path("/usr/src/app/data/teams/")
 FOLDER_DATA_PLAYERS = Path("/usr/src/app/data/players/")
 FOLDER_DATA_GAMES = Path("/usr/src/app/data/games/")
 FOLDER_DATA_PLAYS = Path("/usr/src/app/data/plays/")
+FOLDER_DATA_ROSTERS = Path("/usr/src/app/data/players/rosters/")
 
 FILE_TEAM_ABBREV_TO_TEAM = FOLDER_DATA_TEAMS / "team_abbrev_to_team.json"
 FILE_PLAYERS = FOLDER_DATA_PLAYERS / "players.csv"
+FILE_GAMES_MANIFEST = FOLDER_DATA_GAMES / "manifest.json"
 
 SEASONS = (
     "20152016",
@@ -32,3 +34,4 @@ SEASON_TYPES = (
 URL_STANDINGS = "https://api-web.nhle.com/v1/standings"
 URL_ROSTER = "https://api-web.nhle.com/v1/roster"
 URL_GAMECENTER = "https://api-web.nhle.com/v1/gamecenter"
+URL_SCHEDULE = "https://api-web.nhle.com/v1/schedule"
@@ -1,45 +1,59 @@
 """Script that downloads games info."""
 
-import itertools
+import asyncio
 import json
+from typing import Dict, List
 
-import requests
-from src.config import FOLDER_DATA_GAMES, SEASONS, URL_GAMECENTER
-from src.utils.games import (
-    extract_info_from,
-    get_playoff_games_ids,
-    get_regular_season_games_ids,
-)
+from common.nhl_client import nhl_api
+from src.config import FILE_GAMES_MANIFEST, FOLDER_DATA_GAMES, SEASONS, URL_GAMECENTER
+from src.utils.games import extract_info_from, get_season_game_ids
 from src.utils.general import create_season_folders_in
 
+MAX_CONCURRENT_DOWNLOADS = 16
+MANIFEST_SAVE_FREQUENCY = 100
+MANIFEST_OUTCOMES = ("completed", "missing", "failed")
 
-def download_season_games(regular=True, playoffs=False) -> None:
-    """Download and store game data for regular season and/or playoff games for all seasons.
+
+def read_manifest() -> Dict[str, List[str]]:
+    """Read the manifest of completed, missing, and failed game IDs.
+
+    Returns:
+    --------
+    Dict[str, List[str]]
+        A dictionary mapping the outcome to a list of game IDs, empty lists if there is no manifest yet.
+    """
+    manifest = {outcome: [] for outcome in MANIFEST_OUTCOMES}
+
+    if FILE_GAMES_MANIFEST.exists():
+        with open(FILE_GAMES_MANIFEST, mode="r", encoding="utf-8") as file:
+            manifest.update(json.load(file))
+
+    return manifest
+
+
+def save_manifest(manifest: Dict[str, List[str]]) -> None:
+    """Save the manifest of completed, missing, and failed game IDs.
+
+    The manifest is written into a temporary file first, so an interrupted run does not corrupt it.
 
     Parameters:
     -----------
-    regular: bool, optional
-        If True, download data for regular season games. Default is True.
-    playoffs: bool, optional
-        If True, download data for playoff games. Default is False.
+    manifest: Dict[str, List[str]]
+        A dictionary mapping the outcome to a list of game IDs.
 
     Returns:
     --------
     None
     """
-    for season in SEASONS:
-        season_first_year = int(season[:4])
+    file_path_tmp = FILE_GAMES_MANIFEST.with_suffix(".tmp")
 
-        for game_id in itertools.chain(
-            get_regular_season_games_ids(season=season_first_year) if regular else [],
-            get_playoff_games_ids(season=season_first_year) if playoffs else [],
-        ):
-            download_game(game_id=game_id)
+    with open(file_path_tmp, mode="w", encoding="utf-8") as file:
+        json.dump(obj={outcome: sorted(game_ids) for outcome, game_ids in manifest.items()}, fp=file)
 
-        print(f"✅ {season} season loaded successfully!")
+    file_path_tmp.replace(FILE_GAMES_MANIFEST)
 
 
-def download_game(game_id: str) -> None:
+def download_game(game_id: str) -> str:
     """Download and save a game's play-by-play and game metadata as JSON files based on the game ID.
 
     Parameters:
@@ -49,27 +63,94 @@ def download_game(game_id: str) -> None:
 
     Returns:
     --------
-    None
+    str
+        An outcome of the download, `completed`, `missing` if the game does not exist, or `failed`.
     """
     season, season_type = extract_info_from(game_id=game_id)
     file_path_game = FOLDER_DATA_GAMES / season / season_type / f"{game_id}.json"
 
     if file_path_game.exists():
-        print(f"ℹ️ Info: Game {game_id} was already downloaded!")
+        return "completed"
+
+    response = nhl_api.get(url=f"{URL_GAMECENTER}/{game_id}/play-by-play")
+
+    if response is not None and response.status_code == 404:
+        return "missing"
+
+    # if game is finished, save data as downloaded
+    if response is not None and response.ok and json.loads(response.content).get("gameState") == "OFF":
+        file_path_game.write_bytes(response.content)
+        return "completed"
+
+    print(f"❌ Error: Game {game_id} was NOT loaded!")
+    return "failed"
+
+
+async def download_games(game_ids: List[str], manifest: Dict[str, List[str]]) -> None:
+    """Download games with bounded concurrency, and record the outcomes in the manifest.
+
+    Parameters:
+    -----------
+    game_ids: List[str]
+        A list of game IDs to download.
+    manifest: Dict[str, List[str]]
+        A dictionary mapping the outcome to a list of game IDs, updated in place.
+
+    Returns:
+    --------
+    None
+    """
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_DOWNLOADS)
+
+    async def download_game_bounded(game_id: str) -> tuple:
+        async with semaphore:
+            return game_id, await asyncio.to_thread(download_game, game_id)
+
+    outcomes_cnt = 0
+    for task in asyncio.as_completed([download_game_bounded(game_id=game_id) for game_id in game_ids]):
+        game_id, outcome = await task
 
-    else:
-        response = requests.get(url=f"{URL_GAMECENTER}/{game_id}/play-by-play")
+        # a failed game that is retried is removed from the failed ones
+        if game_id in manifest["failed"]:
+            manifest["failed"].remove(game_id)
+        manifest[outcome].append(game_id)
+
+        outcomes_cnt += 1
+        if outcomes_cnt % MANIFEST_SAVE_FREQUENCY == 0:
+            save_manifest(manifest=manifest)
+            print(f"ℹ️ {outcomes_cnt}/{len(game_ids)} games processed.")
+
+
+async def download_season_games() -> None:
+    """Download and store game data for regular season and playoff games for all seasons.
+
+    Game IDs are taken from the season schedules. Games that were completed, or are missing according
+    to the manifest are skipped, so an interrupted download can be resumed.
+
+    Returns:
+    --------
+    None
+    """
+    manifest = read_manifest()
+    skipped_game_ids = set(manifest["completed"]) | set(manifest["missing"])
 
-        if response.ok:
-            game = json.loads(response.text)
+    season_game_ids = await asyncio.gather(
+        *(asyncio.to_thread(get_season_game_ids, season) for season in SEASONS)
+    )
+    game_ids = [
+        game_id for game_ids in season_game_ids for game_id in game_ids if game_id not in skipped_game_ids
+    ]
+    print(f"ℹ️ {len(game_ids)} games to download, {len(skipped_game_ids)} games skipped.")
 
-            # if game is finished, save data
-            if game.get("gameState") == "OFF":
-                with open(file_path_game, mode="w", encoding="utf-8") as file:
-                    json.dump(obj=game, fp=file)
+    try:
+        await download_games(game_ids=game_ids, manifest=manifest)
+    finally:
+        save_manifest(manifest=manifest)
 
-        else:
-            print(f"❌ Error: Game {game_id} was NOT loaded!")
+    print(
+        f"✅ {len(manifest['completed'])} games completed, {len(manifest['missing'])} games missing, "
+        f"{len(manifest['failed'])} games failed!"
+    )
 
 
 def main() -> None:
@@ -81,7 +162,8 @@ def main() -> None:
     """
     create_season_folders_in(data_folder=FOLDER_DATA_GAMES)
 
-    download_season_games(regular=True, playoffs=True)
+    asyncio.run(download_season_games())
+    nhl_api.log_metrics()
 
     print("🎉 All games data downloaded successfully!")
 
@@ -3,9 +3,10 @@ Script that downloads MoneyPuck.com data, and organizes the downloaded files
 into corresponding folders.
 """
 
-import io
 import json
 import zipfile
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from itertools import product
 from pathlib import Path
 
@@ -20,6 +21,26 @@ STAT_TYPES = ("skaters", "goalies", "teams", "lines")
 SEASON_YEARS = (2018, 2019, 2020, 2021, 2022)
 SEASON_PARTS = ("regular", "playoffs")
 
+SHOTS_SOURCE_URL = "https://peter-tanner.com/moneypuck/downloads"
+# shots columns are numeric, except the following ones
+SHOTS_STRING_COLUMNS = (
+    "awayTeamCode",
+    "event",
+    "goalieNameForShot",
+    "homeTeamCode",
+    "lastEventCategory",
+    "playerPositionThatDidEvent",
+    "shooterLeftRight",
+    "shooterName",
+    "shotType",
+    "team",
+    "teamCode",
+)
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+MAX_WORKERS = 8
+# MoneyPuck.com refuses requests without a browser user agent
+REQUEST_HEADERS = {"User-Agent": "Mozilla/5.0"}
+
 
 def get_col_mappers() -> dict:
     """Return a nested dictionary where the keys represent different data types and the values are
@@ -45,7 +66,7 @@ def download_csv_file(
     source_filepath: str,
     destination_filepath: str,
     moneypuck_col_to_new_col: dict,
-    storage_options={"User-Agent": "Mozilla/5.0"},
+    storage_options=REQUEST_HEADERS,
 ) -> None:
     """Download a CSV file from the specified filepath/URL address, rename the columns using
     the provided mapping dictionary, and save the modified CSV file to the specified filepath.
@@ -80,7 +101,7 @@ def download_csv_file(
 
 def download_player_statistics(moneypuck_col_to_new_col: dict) -> None:
     """Download files with statistics for each statistics type, season year and season part
-    from a specified URL and save the files in the corresponding folder.
+    from a specified URL in parallel, and save the files in the corresponding folder.
 
     Statistics SHOULD be available for the current season going back to the 2008/2009 season.
 
@@ -98,8 +119,7 @@ def download_player_statistics(moneypuck_col_to_new_col: dict) -> None:
         stat_type_folder = DATA_FOLDER / stat_type
         Path(stat_type_folder).mkdir(parents=True, exist_ok=True)
 
-    # download files
-    for stat_type, season_year, season_part in product(STAT_TYPES, SEASON_YEARS, SEASON_PARTS):
+    def download_statistics(stat_type: str, season_year: int, season_part: str) -> None:
         url = f"{DATA_SOURCE_URL}/{season_year}/{season_part}/{stat_type}.csv"
         filepath = DATA_FOLDER / stat_type / f"{season_year}_{season_part}.csv"
 
@@ -111,13 +131,48 @@ def download_player_statistics(moneypuck_col_to_new_col: dict) -> None:
             )
             print(f"✅ downloaded {stat_type} data from the {season_year} {season_part} season")
 
+    # download files in parallel, the files are independent of each other
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = [
+            executor.submit(download_statistics, stat_type, season_year, season_part)
+            for stat_type, season_year, season_part in product(STAT_TYPES, SEASON_YEARS, SEASON_PARTS)
+        ]
+
+    for future in futures:
+        future.result()
+
+
+def download_file(url: str, destination_filepath: Path, headers: dict = REQUEST_HEADERS) -> None:
+    """Stream a file from the specified URL address to disk, without holding it in memory.
+
+    Parameters
+    ----------
+    url : str
+        The URL address of the file.
+    destination_filepath : Path
+        The path where the file will be saved.
+    headers : dict
+        HTTP headers sent with the request.
+
+    Returns
+    -------
+        None
+    """
+    with requests.get(url=url, headers=headers, stream=True, timeout=60) as response:
+        response.raise_for_status()
+
+        with open(destination_filepath, mode="wb") as file:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                file.write(chunk)
+
 
 def download_shots(moneypuck_col_to_new_col: dict) -> None:
-    """Download and extract compressed CSV files containing shots data from multiple seasons.
+    """Download compressed CSV files containing shots data from multiple seasons, and save them
+    as PARQUET files.
 
-    The files are downloaded from a specific URL for each season and saved in the '/data/shots'
-    folder. After extraction, the function renames the files by removing the "shots_" substring
-    from their names.
+    The archive of each season is streamed to disk, and only the mapped columns of its CSV file are
+    read straight from the archive, with explicit data types. The files are saved in the '/data/shots'
+    folder as '<season year>.parquet'.
 
     Parameters
     ----------
@@ -132,34 +187,33 @@ def download_shots(moneypuck_col_to_new_col: dict) -> None:
     shots_folder = DATA_FOLDER / "shots"
     Path(shots_folder).mkdir(parents=True, exist_ok=True)
 
-    # download, and extract compressed CSV files
+    col_to_dtype = defaultdict(lambda: "float64", {col: "category" for col in SHOTS_STRING_COLUMNS})
+
     for season_year in SEASON_YEARS:
-        shots_file_path = shots_folder / f"{season_year}.csv"
+        shots_file_path = shots_folder / f"{season_year}.parquet"
         if shots_file_path.exists():
             continue
 
-        response = requests.get(
-            url=f"https://peter-tanner.com/moneypuck/downloads/shots_{season_year}.zip"
-        )
-
-        with zipfile.ZipFile(io.BytesIO(response.content), "r") as file:
-            file.extractall(path=shots_folder)
+        zip_file_path = shots_folder / f"shots_{season_year}.zip"
+        download_file(url=f"{SHOTS_SOURCE_URL}/shots_{season_year}.zip", destination_filepath=zip_file_path)
 
-    # iterate over files, remove "shots_" substring from the file name, and modify CSV
-    for old_file_path in shots_folder.iterdir():
-        old_file_name = old_file_path.name
+        with zipfile.ZipFile(zip_file_path, mode="r") as archive:
+            csv_file_name = next(name for name in archive.namelist() if name.endswith(".csv"))
 
-        if "shots_" in old_file_name:
-            new_file_name = old_file_name.replace("shots_", "")
-            new_file_path = old_file_path.rename(shots_folder / new_file_name)
+            with archive.open(csv_file_name) as csv_file:
+                df_shots = pd.read_csv(
+                    csv_file,
+                    usecols=lambda col: col in moneypuck_col_to_new_col,
+                    dtype=col_to_dtype,
+                )
 
-            download_csv_file(
-                source_filepath=new_file_path,
-                destination_filepath=new_file_path,
-                moneypuck_col_to_new_col=moneypuck_col_to_new_col,
-                storage_options=None,
-            )
-            print(f"✅ downloaded shots data from the {season_year} season")
+        (
+            df_shots.rename(columns=moneypuck_col_to_new_col)
+            .filter(items=moneypuck_col_to_new_col.values())
+            .to_parquet(shots_file_path, index=False)
+        )
+        zip_file_path.unlink()
+        print(f"✅ downloaded shots data from the {season_year} season")
 
 
 def download_players_lookup(moneypuck_col_to_new_col: dict) -> None:
@@ -1,68 +1,176 @@
 """Script that downloads players info."""
 
+import datetime
 import itertools
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional
 
 import pandas as pd
-import requests
 
-from src.config import FILE_PLAYERS, FOLDER_DATA_PLAYERS, SEASONS, URL_ROSTER
+from common.nhl_client import nhl_api
+from src.config import FILE_PLAYERS, FOLDER_DATA_PLAYERS, FOLDER_DATA_ROSTERS, SEASONS, URL_ROSTER
 from src.extract.teams import read_team_abbrev_to_team_mapping
 
+MAX_CONCURRENT_REQUESTS = 16
+ROSTER_CACHE_TTL = datetime.timedelta(days=1)
 
-def get_season_rosters() -> List:
-    """Retrieve season rosters for teams and compile player information.
+
+def is_roster_cached(file_path_roster: Path, season: str) -> bool:
+    """Check if a team's season roster is cached and up to date.
+
+    A roster cached after its season ended does not change anymore. A roster of a season in progress
+    changes with call-ups and trades, so it expires after `ROSTER_CACHE_TTL`.
+
+    Parameters:
+    -----------
+    file_path_roster : Path
+        A path of the cached roster.
+    season : str
+        A season, e.g. `20232024`.
 
     Returns:
     --------
-    list
-        A list containing player information from the season rosters of various teams.
+    bool
+        True if the cached roster can be used, False otherwise.
+    """
+    if not file_path_roster.exists():
+        return False
+
+    cached_at = datetime.datetime.fromtimestamp(file_path_roster.stat().st_mtime)
+    season_end = datetime.datetime(int(season[4:]), 7, 1)
+
+    return cached_at >= season_end or datetime.datetime.now() - cached_at <= ROSTER_CACHE_TTL
+
+
+def get_roster(team: str, season: str) -> Optional[dict]:
+    """Get a team's season roster, responses are cached on disk, see `is_roster_cached`.
+
+    Parameters:
+    -----------
+    team : str
+        A team abbreviation, e.g. `TOR`.
+    season : str
+        A season, e.g. `20232024`.
+
+    Returns:
+    --------
+    dict or None
+        The roster, or None if the roster was NOT loaded.
+    """
+    file_path_roster = FOLDER_DATA_ROSTERS / f"{team}_{season}.json"
+
+    # a cached roster that cannot be decoded, e.g. written by an interrupted run, is downloaded again
+    if is_roster_cached(file_path_roster=file_path_roster, season=season):
+        try:
+            with open(file_path_roster, mode="r", encoding="utf-8") as file:
+                return json.load(file)
+        except json.JSONDecodeError:
+            print(f"ℹ️ Cached roster for {team} {season} is corrupted, downloading it again.")
+
+    roster = nhl_api.get_json(url=f"{URL_ROSTER}/{team}/{season}")
+
+    if roster is None:
+        print(f"❌ Error: Roster for {team} {season} was NOT loaded!")
+        return None
 
+    # the roster is written into a temporary file first, so an interrupted run does not corrupt the cache
+    file_path_roster_tmp = file_path_roster.with_suffix(".tmp")
+
+    with open(file_path_roster_tmp, mode="w", encoding="utf-8") as file:
+        json.dump(obj=roster, fp=file)
+
+    file_path_roster_tmp.replace(file_path_roster)
+
+    return roster
+
+
+def get_roster_players(roster: dict, team: str, season: str) -> Iterator[dict]:
+    """Extract player information from a team's season roster.
+
+    Parameters:
+    -----------
+    roster : dict
+        A dictionary containing the roster.
+    team : str
+        A team abbreviation.
+    season : str
+        A season of the roster.
+
+    Returns:
+    --------
+    Iterator[dict]
+        An iterator of dictionaries containing player information.
+    """
+    for player in itertools.chain(
+        roster.get("forwards", []),
+        roster.get("defensemen", []),
+        roster.get("goalies", []),
+    ):
+        yield {
+            "id": player.get("id"),
+            "first_name": player.get("firstName", {}).get("default"),
+            "last_name": player.get("lastName", {}).get("default"),
+            "position": player.get("positionCode"),
+            "shoots_catches": player.get("shootsCatches"),
+            "height_cm": player.get("heightInCentimeters"),
+            "weight_kg": player.get("weightInKilograms"),
+            "birth_date": player.get("birthDate"),
+            "birth_city": player.get("birthCity", {}).get("default"),
+            "birth_country": player.get("birthCountry"),
+            "birth_state_province": player.get("birthStateProvince", {}).get("default"),
+            "last_active_team": team,
+            "last_active_season": season,
+            "url_headshot": player.get("headshot"),
+        }
+
+
+def get_season_rosters() -> List[Dict]:
+    """Retrieve season rosters for teams concurrently and compile player information.
+
+    Players are merged as rosters arrive, keeping the latest season of each player.
+
+    Returns:
+    --------
+    list
+        A list containing player information from the latest season roster of each player.
     """
-    rosters = []
     team_abbrev_to_team = read_team_abbrev_to_team_mapping()
+    team_seasons = list(itertools.product(team_abbrev_to_team.keys(), SEASONS))
 
-    for team in team_abbrev_to_team.keys():
-        for season in SEASONS:
-            url = f"{URL_ROSTER}/{team}/{season}"
-            response = requests.get(url)
+    # a player traded within a season is kept with the team that comes later in the mapping
+    team_to_order = {team: order for order, team in enumerate(team_abbrev_to_team.keys())}
+    player_id_to_player = {}
+    loaded_rosters_cnt = 0
 
-            if response.ok:
-                roster = json.loads(response.text)
+    FOLDER_DATA_ROSTERS.mkdir(parents=True, exist_ok=True)
 
-            else:
-                print(f"❌ Error: Roster for {team} {season} was NOT loaded!")
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+        future_to_team_season = {
+            executor.submit(get_roster, team=team, season=season): (team, season) for team, season in team_seasons
+        }
+
+        for future in as_completed(future_to_team_season):
+            team, season = future_to_team_season[future]
+            roster = future.result()
+
+            if roster is None:
                 continue
 
-            rosters += [
-                {
-                    "id": player.get("id"),
-                    "first_name": player.get("firstName", {}).get("default"),
-                    "last_name": player.get("lastName", {}).get("default"),
-                    "position": player.get("positionCode"),
-                    "shoots_catches": player.get("shootsCatches"),
-                    "height_cm": player.get("heightInCentimeters"),
-                    "weight_kg": player.get("weightInKilograms"),
-                    "birth_date": player.get("birthDate"),
-                    "birth_city": player.get("birthCity", {}).get("default"),
-                    "birth_country": player.get("birthCountry"),
-                    "birth_state_province": player.get("birthStateProvince", {}).get("default"),
-                    "last_active_team": team,
-                    "last_active_season": season,
-                    "url_headshot": player.get("headshot"),
-                }
-                for player in itertools.chain(
-                    roster.get("forwards"),
-                    roster.get("defensemen"),
-                    roster.get("goalies"),
-                )
-            ]
-
-        print(f"✅ {team} roster loaded successfully!")
-
-    return rosters
+            loaded_rosters_cnt += 1
+            for player in get_roster_players(roster=roster, team=team, season=season):
+                latest_player = player_id_to_player.get(player["id"])
+
+                if latest_player is None or (season, team_to_order[team]) >= (
+                    latest_player["last_active_season"],
+                    team_to_order[latest_player["last_active_team"]],
+                ):
+                    player_id_to_player[player["id"]] = player
+
+    print(f"✅ {loaded_rosters_cnt}/{len(team_seasons)} rosters loaded successfully!")
+
+    return [player_id_to_player[player_id] for player_id in sorted(player_id_to_player)]
 
 
 def download_players_data(rosters: List[Dict]) -> None:
@@ -72,19 +180,13 @@ def download_players_data(rosters: List[Dict]) -> None:
     Parameters:
     -----------
     rosters : List[Dict]
-        A list of dictionaries containing player information, retrieved from season rosters.
+        A list of dictionaries containing player information, one per player, retrieved from season rosters.
 
     Returns:
     --------
     None
     """
-    (
-        pd.DataFrame(rosters)
-        .sort_values(by=["id", "last_active_season"])
-        .drop_duplicates(subset="id", keep="last")
-        .reset_index(drop=True)
-        .to_csv(FILE_PLAYERS, index=False)
-    )
+    pd.DataFrame(rosters).to_csv(FILE_PLAYERS, index=False)
 
 
 def read_players_data() -> pd.DataFrame:
@@ -106,6 +208,7 @@ def main() -> None:
         None
     """
     rosters = get_season_rosters()
+    nhl_api.log_metrics()
 
     FOLDER_DATA_PLAYERS.mkdir(parents=True, exist_ok=True)
     download_players_data(rosters=rosters)
@@ -4,8 +4,8 @@ import json
 from pathlib import Path
 
 import pandas as pd
-import requests
 
+from common.nhl_client import nhl_api
 from src.config import FILE_TEAM_ABBREV_TO_TEAM, FOLDER_DATA_TEAMS, URL_STANDINGS
 
 
@@ -18,16 +18,15 @@ def get_current_standings() -> dict:
         A dictionary containing the current standings information if the request is successful.
         Returns None if there are issues in retrieving the standings data.
     """
-    response = requests.get(url=f"{URL_STANDINGS}/now")
+    response = nhl_api.get_json(url=f"{URL_STANDINGS}/now")
 
-    if response.ok:
-        standings = json.loads(response.text).get("standings")
-        print("✅ Standings loaded successfully!")
-
-    else:
+    if response is None:
         print("❌ Error: Standings were NOT loaded!")
+        return None
+
+    print("✅ Standings loaded successfully!")
 
-    return standings
+    return response.get("standings")
 
 
 def download_team_abbrev_to_team_mapping(standings: dict) -> None:
@@ -87,6 +86,7 @@ def main() -> None:
 
     FOLDER_DATA_TEAMS.mkdir(parents=True, exist_ok=True)
     download_team_abbrev_to_team_mapping(standings=standings)
+    nhl_api.log_metrics()
 
     print("🎉 All teams data downloaded successfully!")
 
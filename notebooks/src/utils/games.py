@@ -1,9 +1,10 @@
 """Script with games utils."""
 
-import itertools
+import datetime
 from typing import List, Tuple
 
-from src.config import SEASON_TYPES
+from common.nhl_client import nhl_api
+from src.config import SEASON_TYPES, URL_SCHEDULE
 from src.utils.general import get_season_type_index
 
 
@@ -26,59 +27,49 @@ def extract_info_from(game_id: str) -> Tuple[str, str]:
     return season, season_type
 
 
-def get_regular_season_games_ids(season: int) -> List[str]:
-    """Get game IDs for regular season games in a specified season.
+def get_season_game_ids(season: str, season_types: Tuple[str, ...] = ("regular", "playoffs")) -> List[str]:
+    """Get IDs of finished games of a season from the schedule.
 
-    Parameters:
-    -----------
-    season: int
-        The starting year of the season for which regular season game IDs are to be retrieved.
-
-    Returns:
-    --------
-    List[str]
-        A list containing game IDs representing regular season games for the specified season.
-    """
-    season_type_i = get_season_type_index(season_type="regular")
-
-    if season >= 2021:
-        games_cnt = 1312
-    elif season == 2020:
-        games_cnt = 868
-    elif season == 2019:
-        games_cnt = 1082
-    elif season == 2018:
-        games_cnt = 1272
-    elif season == 2017:
-        games_cnt = 1271
-    else:
-        games_cnt = 1230
-
-    return [
-        f"{season}{season_type_i}{str(game_i).rjust(4, '0')}" for game_i in range(1, games_cnt + 1)
-    ]
-
-
-def get_playoff_games_ids(season: int) -> List[str]:
-    """Get game IDs for playoff games in a specified season.
+    Only official games in `OFF` state are returned, games in `FINAL` state are not official yet, and are
+    returned once their data is final.
 
     Parameters:
     -----------
-    season: int
-        The starting year of the season for which playoff game IDs are to be retrieved.
+    season: str
+        A season, e.g. `20232024`.
+    season_types: Tuple[str, ...], optional
+        Season types of the games. Default is regular season and playoffs.
 
     Returns:
     --------
     List[str]
-        A list containing game IDs representing playoff games for the specified season.
+        A list containing IDs of finished games of the season.
     """
-    season_type_i = get_season_type_index(season_type="playoffs")
-    prefixes = itertools.chain(
-        [f"{season}{season_type_i}01{match_up_i}" for match_up_i in range(1, 9)],
-        [f"{season}{season_type_i}02{match_up_i}" for match_up_i in range(1, 5)],
-        [f"{season}{season_type_i}03{match_up_i}" for match_up_i in range(1, 3)],
-        [f"{season}{season_type_i}041"],
+    season_type_indexes = [get_season_type_index(season_type=season_type) for season_type in season_types]
+    season_first_year = int(season[:4])
+    game_ids = []
+
+    # a season is played between September and the next September at the latest, the schedule endpoint
+    # returns a week of game days starting at the requested date
+    week_start_date = datetime.date(season_first_year, 9, 1)
+    while week_start_date <= datetime.date(season_first_year + 1, 9, 30):
+        schedule = nhl_api.get_json(url=f"{URL_SCHEDULE}/{week_start_date.isoformat()}")
+
+        if schedule is None:
+            print(f"❌ Error: Schedule for the week starting at {week_start_date} was NOT loaded!")
+        else:
+            game_ids += [
+                str(game.get("id"))
+                for game_day in schedule.get("gameWeek", [])
+                for game in game_day.get("games", [])
+                if game.get("gameState") == "OFF"
+            ]
+
+        week_start_date += datetime.timedelta(days=7)
+
+    # games of adjacent seasons played in the same weeks are filtered out by the season in the game ID
+    return sorted(
+        game_id
+        for game_id in set(game_ids)
+        if game_id[:4] == season[:4] and game_id[4:6] in season_type_indexes
     )
-    return [
-        f"{prefix}{game_i}" for prefix, game_i in itertools.product(prefixes, list(range(1, 8)))
-    ]
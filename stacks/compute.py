@@ -1,32 +1,97 @@
 from pathlib import Path
+from typing import Dict, Tuple
 
 from aws_cdk import (
+    ArnFormat,
     Duration,
     Stack,
     aws_events,
     aws_events_targets,
+    aws_iam,
     aws_lambda,
+    aws_lambda_event_sources,
     aws_s3,
     aws_s3_notifications,
+    aws_scheduler,
+    aws_sqs,
 )
 from constructs import Construct
 
 from stacks.utils import get_name
 
+LAMBDAS_FOLDER = Path(__file__).resolve().parent / "lambdas"
+# folders of the build context shared by all lambda functions
+LAMBDAS_SHARED_FOLDER_NAMES = ("common",)
+
+
+def get_lambda_image_code(lambda_name: str) -> aws_lambda.DockerImageCode:
+    """Get Docker image code of a lambda function, built from the `lambdas/` folder.
+
+    Folders of other lambda functions are excluded from the build context, so a change of one lambda
+    function does NOT change the asset hash, and does NOT rebuild images, of the other ones.
+
+    Parameters:
+    -----------
+    lambda_name : str
+        A name of the lambda function folder, e.g. `download-raw-games`.
+
+    Returns:
+    --------
+    aws_lambda.DockerImageCode
+    """
+    return aws_lambda.DockerImageCode.from_image_asset(
+        LAMBDAS_FOLDER.as_posix(),
+        file=f"{lambda_name}/Dockerfile",
+        exclude=[
+            path.name
+            for path in LAMBDAS_FOLDER.iterdir()
+            if path.name not in (lambda_name, *LAMBDAS_SHARED_FOLDER_NAMES)
+        ]
+        + ["**/__pycache__"],
+    )
+
 
 class Compute(Stack):
     """Stack with compute services."""
 
     frequency_cron_download_raw_games = {"minute": "0", "hour": "7"}
     frequency_cron_download_schedule = {"minute": "0", "hour": "7"}
+    download_raw_games_lookback_days = 3
+    download_raw_games_backfill_parallelism = 4
+    game_poll_expected_duration_minutes = 150
+    game_poll_interval_minutes = 10
+    game_poll_max_attempts = 12
+    live_poll_interval_seconds = 15
+    game_log_cache_ttl_seconds = 6 * 60 * 60
+    transform_raw_to_base_via_queue = True
+    transform_raw_to_base_batch_size = 10
+    transform_raw_to_base_max_batching_window = Duration.seconds(30)
 
     def __init__(self, scope: Construct, construct_id: str, storage_stack: Stack, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
+        # the ARNs are built from the names to avoid circular dependencies between the functions and their roles
+        self.arn_download_raw_games = self.format_arn(
+            service="lambda",
+            resource="function",
+            resource_name=get_name("download-raw-games"),
+            arn_format=ArnFormat.COLON_RESOURCE_NAME,
+        )
+        self.arn_transform_raw_to_base = self.format_arn(
+            service="lambda",
+            resource="function",
+            resource_name=get_name("transform-raw-to-base"),
+            arn_format=ArnFormat.COLON_RESOURCE_NAME,
+        )
+        self.schedule_group_game_polls, self.role_game_polls = self.create_game_polls()
+
         self.lambda_download_raw_games = self.create_lambda_download_raw_games(storage_stack=storage_stack)
         self.lambda_download_seeds_teams = self.create_lambda_download_seeds_teams(storage_stack=storage_stack)
         self.lambda_download_schedule = self.create_lambda_download_schedule(storage_stack=storage_stack)
-        self.lambda_transform_raw_to_base = self.create_lambda_transform_raw_to_base(storage_stack=storage_stack)
+        self.lambda_transform_raw_to_base = self.create_lambda_transform_raw_to_base(
+            storage_stack=storage_stack,
+            via_queue=self.transform_raw_to_base_via_queue,
+        )
 
     def create_lambda_download_raw_games(self, storage_stack: Stack) -> aws_lambda.DockerImageFunction:
         """Create a Docker container-based AWS Lambda function to download raw games.
@@ -48,19 +113,30 @@ class Compute(Stack):
             id="LambdaDownloadRawGames",
             function_name=get_name("download-raw-games"),
             description="Download raw games data from NHL API.",
-            code=aws_lambda.DockerImageCode.from_image_asset(
-                (Path(__file__).resolve().parent / "lambdas" / "download-raw-games").as_posix()
-            ),
+            code=get_lambda_image_code(lambda_name="download-raw-games"),
             architecture=aws_lambda.Architecture.X86_64,
-            timeout=Duration.seconds(60),
+            timeout=Duration.minutes(5),
             environment={
                 "DESTINATION_BUCKET": storage_stack.bucket_raw.bucket_name,
+                "LOOKBACK_DAYS": str(self.download_raw_games_lookback_days),
+                "BACKFILL_PARALLELISM": str(self.download_raw_games_backfill_parallelism),
+                "POLL_INTERVAL_MINUTES": str(self.game_poll_interval_minutes),
+                "MAX_POLL_ATTEMPTS": str(self.game_poll_max_attempts),
+                **self.get_game_polls_environment(),
             },
         )
 
         # grant lambda function the permissions to read/write from/to the S3 bucket
         storage_stack.bucket_raw.grant_read_write(identity=lambda_download_raw_games)
 
+        # grant lambda function the permission to invoke itself, backfills are split and resumed that way
+        lambda_download_raw_games.add_to_role_policy(
+            aws_iam.PolicyStatement(actions=["lambda:InvokeFunction"], resources=[self.arn_download_raw_games])
+        )
+
+        # grant lambda function the permissions to schedule next polls of a game that is not final yet
+        self.grant_schedule_game_polls(lambda_function=lambda_download_raw_games)
+
         # schedule lambda function to run on regular basis
         event_rule = aws_events.Rule(
             self,
@@ -92,9 +168,7 @@ class Compute(Stack):
             id="LambdaDownloadSeedsTeams",
             function_name=get_name("download-seeds-teams"),
             description="Download seeds teams data from NHL API.",
-            code=aws_lambda.DockerImageCode.from_image_asset(
-                (Path(__file__).resolve().parent / "lambdas" / "download-seeds-teams").as_posix()
-            ),
+            code=get_lambda_image_code(lambda_name="download-seeds-teams"),
             architecture=aws_lambda.Architecture.X86_64,
             timeout=Duration.seconds(60),
             environment={
@@ -127,19 +201,22 @@ class Compute(Stack):
             id="LambdaDownloadSchedule",
             function_name=get_name("download-schedule"),
             description="Download games schedule data from NHL API.",
-            code=aws_lambda.DockerImageCode.from_image_asset(
-                (Path(__file__).resolve().parent / "lambdas" / "download-schedule").as_posix()
-            ),
+            code=get_lambda_image_code(lambda_name="download-schedule"),
             architecture=aws_lambda.Architecture.X86_64,
             timeout=Duration.seconds(60),
             environment={
                 "DESTINATION_BUCKET": storage_stack.bucket_base.bucket_name,
+                "EXPECTED_GAME_DURATION_MINUTES": str(self.game_poll_expected_duration_minutes),
+                **self.get_game_polls_environment(),
             },
         )
 
         # grant lambda function the permissions to read/write from/to the S3 bucket
         storage_stack.bucket_base.grant_read_write(identity=lambda_download_schedule)
 
+        # grant lambda function the permissions to schedule polls of games after their expected end
+        self.grant_schedule_game_polls(lambda_function=lambda_download_schedule)
+
         # schedule lambda function to run on regular basis
         event_rule = aws_events.Rule(
             self,
@@ -151,7 +228,78 @@ class Compute(Stack):
 
         return lambda_download_schedule
 
-    def create_lambda_transform_raw_to_base(self, storage_stack: Stack) -> aws_lambda.DockerImageFunction:
+    def create_game_polls(self) -> Tuple[aws_scheduler.CfnScheduleGroup, aws_iam.Role]:
+        """Create a schedule group for one-time polls of games, and a role the polls invoke
+        the lambda functions to download raw games, and to ingest live games with.
+
+        Returns:
+        --------
+        Tuple[aws_scheduler.CfnScheduleGroup, aws_iam.Role]
+            The schedule group, and the role of game polls.
+        """
+        schedule_group_game_polls = aws_scheduler.CfnScheduleGroup(
+            self,
+            id="ScheduleGroupGamePolls",
+            name=get_name("game-polls"),
+        )
+
+        role_game_polls = aws_iam.Role(
+            self,
+            id="RoleGamePolls",
+            assumed_by=aws_iam.ServicePrincipal("scheduler.amazonaws.com"),
+        )
+        role_game_polls.add_to_policy(
+            aws_iam.PolicyStatement(
+                actions=["lambda:InvokeFunction"],
+                resources=[self.arn_download_raw_games, self.arn_transform_raw_to_base],
+            )
+        )
+
+        return schedule_group_game_polls, role_game_polls
+
+    def get_game_polls_environment(self) -> Dict[str, str]:
+        """Get environment variables of a lambda function that schedules game polls.
+
+        Returns:
+        --------
+        Dict[str, str]
+        """
+        return {
+            "POLL_SCHEDULE_GROUP": self.schedule_group_game_polls.name,
+            "POLL_TARGET_ARN": self.arn_download_raw_games,
+            "LIVE_TARGET_ARN": self.arn_transform_raw_to_base,
+            "POLL_ROLE_ARN": self.role_game_polls.role_arn,
+        }
+
+    def grant_schedule_game_polls(self, lambda_function: aws_lambda.DockerImageFunction) -> None:
+        """Grant a lambda function the permissions to schedule game polls.
+
+        Parameters:
+        -----------
+        lambda_function : aws_lambda.DockerImageFunction
+            The lambda function that schedules game polls.
+
+        Returns:
+        --------
+        None
+        """
+        lambda_function.add_to_role_policy(
+            aws_iam.PolicyStatement(
+                actions=["scheduler:CreateSchedule"],
+                resources=[
+                    self.format_arn(
+                        service="scheduler",
+                        resource="schedule",
+                        resource_name=f"{self.schedule_group_game_polls.name}/*",
+                    )
+                ],
+            )
+        )
+        self.role_game_polls.grant_pass_role(identity=lambda_function)
+
+    def create_lambda_transform_raw_to_base(
+        self, storage_stack: Stack, via_queue: bool = True
+    ) -> aws_lambda.DockerImageFunction:
         """Create a Docker container-based AWS Lambda function to transform raw data into base data.
 
         Parameters:
@@ -160,6 +308,9 @@ class Compute(Stack):
             The instance of the class.
         storage_stack : Stack
             The stack containing the destination bucket.
+        via_queue : bool, optional
+            If True, S3 notifications are sent to the function through an SQS queue in batches,
+            otherwise the function is invoked for every S3 notification.
 
         Returns:
         --------
@@ -171,13 +322,14 @@ class Compute(Stack):
             id="LambdaTransformRawToBase",
             function_name=get_name("transform-raw-to-base"),
             description="Transform raw data into base data.",
-            code=aws_lambda.DockerImageCode.from_image_asset(
-                (Path(__file__).resolve().parent / "lambdas" / "transform-raw-to-base").as_posix()
-            ),
+            code=get_lambda_image_code(lambda_name="transform-raw-to-base"),
             architecture=aws_lambda.Architecture.X86_64,
-            timeout=Duration.seconds(60),
+            timeout=Duration.seconds(60 * self.transform_raw_to_base_batch_size if via_queue else 5 * 60),
             environment={
                 "DESTINATION_BUCKET": storage_stack.bucket_base.bucket_name,
+                "GAME_LOG_CACHE_LOCATION": f"s3://{storage_stack.bucket_base.bucket_name}/cache/game-logs",
+                "GAME_LOG_CACHE_TTL_SECONDS": str(self.game_log_cache_ttl_seconds),
+                "LIVE_POLL_INTERVAL_SECONDS": str(self.live_poll_interval_seconds),
             },
         )
 
@@ -185,21 +337,75 @@ class Compute(Stack):
         storage_stack.bucket_raw.grant_read(identity=lambda_transform_raw_to_base)
         storage_stack.bucket_base.grant_read_write(identity=lambda_transform_raw_to_base)
 
+        # grant lambda function the permission to invoke itself, live ingestion of a game continues that way
+        lambda_transform_raw_to_base.add_to_role_policy(
+            aws_iam.PolicyStatement(actions=["lambda:InvokeFunction"], resources=[self.arn_transform_raw_to_base])
+        )
+
         # trigger lambda function when a new file is added into raw bucket
         bucket_raw = aws_s3.Bucket.from_bucket_name(
             self,
             id="S3BucketFrozenFactsCenterBaseFromName",
             bucket_name=storage_stack.bucket_raw.bucket_name,
         )
-        bucket_raw.add_event_notification(
-            aws_s3.EventType.OBJECT_CREATED_PUT,
-            aws_s3_notifications.LambdaDestination(fn=lambda_transform_raw_to_base),
-            aws_s3.NotificationKeyFilter(prefix="games/", suffix=".json"),
+        if via_queue:
+            notification_destination = aws_s3_notifications.SqsDestination(
+                queue=self.create_queue_transform_raw_to_base(lambda_transform_raw_to_base=lambda_transform_raw_to_base)
+            )
+        else:
+            notification_destination = aws_s3_notifications.LambdaDestination(fn=lambda_transform_raw_to_base)
+
+        for prefix in ["games/", "shift-charts/"]:
+            bucket_raw.add_event_notification(
+                aws_s3.EventType.OBJECT_CREATED_PUT,
+                notification_destination,
+                aws_s3.NotificationKeyFilter(prefix=prefix, suffix=".json"),
+            )
+
+        return lambda_transform_raw_to_base
+
+    def create_queue_transform_raw_to_base(
+        self, lambda_transform_raw_to_base: aws_lambda.DockerImageFunction
+    ) -> aws_sqs.Queue:
+        """Create an SQS queue that buffers S3 notifications, and feeds them in batches to the AWS Lambda
+        function that transforms raw data into base data.
+
+        Parameters:
+        -----------
+        self : instance
+            The instance of the class.
+        lambda_transform_raw_to_base : aws_lambda.DockerImageFunction
+            The Lambda function to transform raw data into base data.
+
+        Returns:
+        --------
+        aws_sqs.Queue
+            The SQS queue with S3 notifications.
+        """
+        dead_letter_queue = aws_sqs.Queue(
+            self,
+            id="SqsQueueTransformRawToBaseDeadLetter",
+            queue_name=get_name("queue-transform-raw-to-base-dlq"),
+            retention_period=Duration.days(14),
         )
-        bucket_raw.add_event_notification(
-            aws_s3.EventType.OBJECT_CREATED_PUT,
-            aws_s3_notifications.LambdaDestination(fn=lambda_transform_raw_to_base),
-            aws_s3.NotificationKeyFilter(prefix="shift-charts/", suffix=".json"),
+
+        queue = aws_sqs.Queue(
+            self,
+            id="SqsQueueTransformRawToBase",
+            queue_name=get_name("queue-transform-raw-to-base"),
+            # visibility timeout should be at least 6 times the lambda function timeout
+            visibility_timeout=Duration.seconds(6 * 60 * self.transform_raw_to_base_batch_size),
+            dead_letter_queue=aws_sqs.DeadLetterQueue(max_receive_count=3, queue=dead_letter_queue),
         )
 
-        return lambda_transform_raw_to_base
+        # trigger lambda function with batches of messages, and retry only failed messages
+        lambda_transform_raw_to_base.add_event_source(
+            aws_lambda_event_sources.SqsEventSource(
+                queue=queue,
+                batch_size=self.transform_raw_to_base_batch_size,
+                max_batching_window=self.transform_raw_to_base_max_batching_window,
+                report_batch_item_failures=True,
+            )
+        )
+
+        return queue
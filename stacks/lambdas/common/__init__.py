@@ -0,0 +1,3 @@
+from common.nhl_client import NhlApiClient, TokenBucket, nhl_api
+
+__all__ = ["NhlApiClient", "TokenBucket", "nhl_api"]
@@ -0,0 +1,226 @@
+"""Shared NHL API client.
+
+The client is used by every lambda function and by the notebooks' extract scripts. It provides
+- a pooled keep-alive HTTP session,
+- a timeout for every request,
+- retries with jittered exponential backoff on connection errors, 429 and 5xx responses,
+- a token bucket rate limiter shared by all threads using the same client,
+- per-endpoint request, error, retry, and latency metrics.
+"""
+
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class TokenBucket:
+    """Thread-safe token bucket rate limiter."""
+
+    def __init__(self, rate_per_second: float, capacity: int) -> None:
+        self.rate_per_second = rate_per_second
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Take a token from the bucket, wait until a token is available if the bucket is empty.
+
+        Returns:
+        --------
+        None
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate_per_second)
+                self.updated_at = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                wait_seconds = (1 - self.tokens) / self.rate_per_second
+
+            time.sleep(wait_seconds)
+
+
+class NhlApiClient:
+    """Resilient client of NHL API endpoints."""
+
+    def __init__(
+        self,
+        max_connections: int = 16,
+        timeout_seconds: float = 10,
+        max_retries: int = 4,
+        backoff_base_seconds: float = 0.5,
+        backoff_max_seconds: float = 20,
+        rate_per_second: float = 10,
+        burst: int = 10,
+    ) -> None:
+        self.timeout_seconds = timeout_seconds
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.rate_limiter = TokenBucket(rate_per_second=rate_per_second, capacity=burst)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_connections)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.metrics: Dict[str, Dict[str, float]] = defaultdict(
+            lambda: {"requests": 0, "errors": 0, "retries": 0, "latency_ms": 0.0}
+        )
+        self.metrics_lock = threading.Lock()
+
+    def get(self, url: str, **kwargs) -> Optional[requests.Response]:
+        """Send a GET request, retry it on connection errors, 429 and 5xx responses.
+
+        Parameters:
+        -----------
+        url : str
+            A URL of the NHL API endpoint.
+        **kwargs
+            Keyword arguments passed to `requests.Session.get`.
+
+        Returns:
+        --------
+        requests.Response or None
+            The last response, or None if no response was received.
+        """
+        endpoint = get_endpoint(url=url)
+        timeout = kwargs.pop("timeout", self.timeout_seconds)
+        response = None
+
+        for attempt in range(self.max_retries + 1):
+            if attempt > 0:
+                self.record(endpoint=endpoint, retries=1)
+                time.sleep(self.get_backoff_seconds(attempt=attempt, response=response))
+
+            self.rate_limiter.acquire()
+            start = time.perf_counter()
+
+            try:
+                response = self.session.get(url, timeout=timeout, **kwargs)
+            except requests.RequestException:
+                response = None
+
+            self.record(
+                endpoint=endpoint,
+                requests=1,
+                errors=int(response is None or not response.ok),
+                latency_ms=(time.perf_counter() - start) * 1000,
+            )
+
+            if response is not None and response.status_code not in RETRY_STATUS_CODES:
+                break
+
+        return response
+
+    def get_json(self, url: str, **kwargs) -> Optional[dict]:
+        """Send a GET request, and parse the JSON response.
+
+        Parameters:
+        -----------
+        url : str
+            A URL of the NHL API endpoint.
+        **kwargs
+            Keyword arguments passed to `requests.Session.get`.
+
+        Returns:
+        --------
+        dict or None
+            The parsed response, or None if the request was NOT successful.
+        """
+        response = self.get(url=url, **kwargs)
+
+        if response is None or not response.ok:
+            return None
+
+        return response.json()
+
+    def get_backoff_seconds(self, attempt: int, response: Optional[requests.Response]) -> float:
+        """Get the time to wait before a retry, `Retry-After` header is respected if present.
+
+        Parameters:
+        -----------
+        attempt : int
+            A number of the retry, starting from 1.
+        response : requests.Response or None
+            The response of the previous attempt.
+
+        Returns:
+        --------
+        float
+        """
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after is not None and retry_after.isdigit():
+            return min(float(retry_after), self.backoff_max_seconds)
+
+        # full jitter exponential backoff
+        return random.uniform(0, min(self.backoff_max_seconds, self.backoff_base_seconds * 2**attempt))
+
+    def record(self, endpoint: str, **values: float) -> None:
+        """Add values to the metrics of an endpoint.
+
+        Parameters:
+        -----------
+        endpoint : str
+            A name of the endpoint.
+        **values : float
+            Values to add, e.g. `requests=1`.
+
+        Returns:
+        --------
+        None
+        """
+        with self.metrics_lock:
+            for name, value in values.items():
+                self.metrics[endpoint][name] += value
+
+    def log_metrics(self) -> None:
+        """Print metrics of every called endpoint, and reset them.
+
+        Returns:
+        --------
+        None
+        """
+        with self.metrics_lock:
+            for endpoint, metrics in sorted(self.metrics.items()):
+                print(
+                    f"ℹ️ NHL API `{endpoint}`: {metrics['requests']:.0f} requests, "
+                    f"{metrics['errors']:.0f} errors, {metrics['retries']:.0f} retries, "
+                    f"{metrics['latency_ms'] / max(metrics['requests'], 1):.0f} ms average latency"
+                )
+            self.metrics.clear()
+
+
+def get_endpoint(url: str) -> str:
+    """Get an endpoint name from a URL, with numeric path segments replaced by a placeholder.
+
+    Parameters:
+    -----------
+    url : str
+        A URL of the NHL API endpoint.
+
+    Returns:
+    --------
+    str
+        The endpoint name, e.g. `api-web.nhle.com/v1/gamecenter/{id}/play-by-play`.
+    """
+    parsed_url = urlparse(url)
+    return f"{parsed_url.netloc}{re.sub(r'/[0-9-]+(?=/|$)', '/{id}', parsed_url.path)}"
+
+
+# client shared by all workers of a process
+nhl_api = NhlApiClient()
@@ -0,0 +1,104 @@
+"""Scheduling of game polls.
+
+A game is polled by a one-time EventBridge schedule that invokes the `download-raw-games` lambda function
+with the game ID, and followed live by a schedule that invokes the `transform-raw-to-base` lambda function
+at the start of the game. The schedule group, the targets, and the role are passed to lambda functions
+in environment variables `POLL_SCHEDULE_GROUP`, `POLL_TARGET_ARN`, `LIVE_TARGET_ARN`, and `POLL_ROLE_ARN`.
+"""
+
+import datetime
+import json
+import os
+
+import boto3
+
+scheduler = boto3.client("scheduler")
+
+
+def schedule_invocation(name: str, invoke_at: datetime.datetime, target_arn: str, payload: dict) -> bool:
+    """Schedule a one-time invocation of a lambda function.
+
+    A schedule that already exists is kept, so an invocation can be scheduled repeatedly.
+
+    Parameters:
+    -----------
+    name : str
+        A unique name of the schedule.
+    invoke_at : datetime.datetime
+        A timezone-aware time of the invocation.
+    target_arn : str
+        An ARN of the lambda function.
+    payload : dict
+        An event the lambda function is invoked with.
+
+    Returns:
+    --------
+    bool
+        True if the invocation was scheduled, False if it was already scheduled.
+    """
+    try:
+        scheduler.create_schedule(
+            Name=name,
+            GroupName=os.environ["POLL_SCHEDULE_GROUP"],
+            ScheduleExpression=f"at({invoke_at.astimezone(datetime.timezone.utc):%Y-%m-%dT%H:%M:%S})",
+            ScheduleExpressionTimezone="UTC",
+            FlexibleTimeWindow={"Mode": "OFF"},
+            ActionAfterCompletion="DELETE",
+            Target={
+                "Arn": target_arn,
+                "RoleArn": os.environ["POLL_ROLE_ARN"],
+                "Input": json.dumps(payload),
+            },
+        )
+    except scheduler.exceptions.ConflictException:
+        return False
+
+    return True
+
+
+def schedule_game_poll(game_id: str, poll_at: datetime.datetime, attempt: int = 1) -> bool:
+    """Schedule a poll of a game by the `download-raw-games` lambda function.
+
+    Parameters:
+    -----------
+    game_id : str
+        A string representing the unique identifier of the game.
+    poll_at : datetime.datetime
+        A timezone-aware time of the poll.
+    attempt : int, optional
+        A number of the poll of the game, starting from 1. Defaults to 1.
+
+    Returns:
+    --------
+    bool
+        True if the poll was scheduled, False if it was already scheduled.
+    """
+    return schedule_invocation(
+        name=f"game-{game_id}-poll-{attempt}",
+        invoke_at=poll_at,
+        target_arn=os.environ["POLL_TARGET_ARN"],
+        payload={"game_ids": [game_id], "poll_attempt": attempt},
+    )
+
+
+def schedule_live_game(game_id: str, start_at: datetime.datetime) -> bool:
+    """Schedule live ingestion of a game by the `transform-raw-to-base` lambda function.
+
+    Parameters:
+    -----------
+    game_id : str
+        A string representing the unique identifier of the game.
+    start_at : datetime.datetime
+        A timezone-aware start time of the game.
+
+    Returns:
+    --------
+    bool
+        True if the live ingestion was scheduled, False if it was already scheduled.
+    """
+    return schedule_invocation(
+        name=f"game-{game_id}-live",
+        invoke_at=start_at,
+        target_arn=os.environ["LIVE_TARGET_ARN"],
+        payload={"live_game_id": game_id},
+    )
@@ -1,26 +1,346 @@
 """
 Lambda function to download a game's play-by-play and game metadata as JSON files,
-and save them into S3 bucket.
+and save them compressed into S3 bucket.
 """
 
+import datetime
+import gzip
+import hashlib
 import json
 import os
-from typing import Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 
 import boto3
-import requests
-from utils import SeasonType, extract_info_from, get_yesterday_game_ids
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from common.nhl_client import nhl_api
+from common.scheduler import schedule_game_poll
+from utils import (
+    SeasonType,
+    extract_info_from,
+    get_finished_game_ids,
+    get_game_state,
+    get_recent_game_ids,
+    get_season_game_ids,
+)
 
 DESTINATION_BUCKET = os.environ["DESTINATION_BUCKET"]
+MAX_WORKERS = int(os.environ.get("MAX_WORKERS", 8))
+LOOKBACK_DAYS = int(os.environ.get("LOOKBACK_DAYS", 3))
+BACKFILL_PARALLELISM = int(os.environ.get("BACKFILL_PARALLELISM", 4))
+CHUNK_SIZE = 2 * MAX_WORKERS
+MIN_REMAINING_TIME_MS = 60 * 1000
+POLL_INTERVAL = datetime.timedelta(minutes=int(os.environ.get("POLL_INTERVAL_MINUTES", 10)))
+MAX_POLL_ATTEMPTS = int(os.environ.get("MAX_POLL_ATTEMPTS", 12))
+CONTENT_ENCODING = "gzip"
+COMPRESS_LEVEL = 6
 URL_GAMECENTER = "https://api-web.nhle.com/v1/gamecenter"
 URL_SHIFTCHART = "https://api.nhle.com/stats/rest/en/shiftcharts?cayenneExp=gameId="
 
-s3 = boto3.resource("s3")
+s3_client = boto3.client("s3", config=Config(max_pool_connections=MAX_WORKERS))
+lambda_client = boto3.client("lambda")
 
 
-def handler(event: dict, context: Any) -> None:
+def get_download_tasks(game_id: str) -> Tuple[Tuple[str, str, str], ...]:
+    """Get the URLs to download for a game, along with the data type and the destination S3 key.
+
+    Parameters:
+    -----------
+    game_id: str
+        A string representing the unique identifier of the game.
+
+    Returns:
+    --------
+    Tuple[Tuple[str, str, str], ...]
+        A tuple of (url, data type, S3 key) tuples.
+    """
+    season, season_type = extract_info_from(game_id=game_id)
+
+    return (
+        (
+            f"{URL_GAMECENTER}/{game_id}/play-by-play",
+            "game data",
+            f"games/{season}/{season_type}/{game_id}.json",
+        ),
+        (
+            f"{URL_SHIFTCHART}{game_id}",
+            "shift chart",
+            f"shift-charts/{season}/{season_type}/{game_id}.json",
+        ),
+    )
+
+
+def get_stored_metadata(s3_key: str) -> Optional[dict]:
+    """Get the metadata of the payload stored in S3 bucket.
+
+    Parameters:
+    -----------
+    s3_key: str
+        A key of the S3 object with the payload.
+
+    Returns:
+    --------
+    dict or None
+        The metadata of the stored payload, or None if the payload is not stored yet.
+    """
+    try:
+        return s3_client.head_object(Bucket=DESTINATION_BUCKET, Key=s3_key)["Metadata"]
+    except ClientError:
+        return None
+
+
+def download_and_save(game_id: str, url: str, data_type: str, s3_key: str, skip_stored: bool = False) -> str:
+    """Download data from NHL API endpoint, and save them into S3 bucket if they changed.
+
+    Only changed payloads are written, so the transformation is triggered by real updates only.
+
+    Parameters:
+    -----------
+    game_id: str
+        A string representing the unique identifier of the game.
+    url: str
+        A URL of the NHL API endpoint.
+    data_type: str
+        A description of the downloaded data.
+    s3_key: str
+        A key of the S3 object to save the data into.
+    skip_stored: bool, optional
+        If True, data already stored in S3 bucket are not downloaded again. Default is False.
+
+    Returns:
+    --------
+    str
+        An outcome of the download, `saved` or `unchanged` on success, or an error description.
+    """
+    try:
+        stored_metadata = get_stored_metadata(s3_key=s3_key)
+
+        if skip_stored and stored_metadata is not None:
+            return "unchanged"
+
+        response = nhl_api.get(url=url)
+
+        if response is None:
+            return "no response"
+
+        if not response.ok:
+            return f"HTTP {response.status_code}"
+
+        print(f"ℹ️ Downloaded {data_type} for the following game id: `{game_id}`")
+        payload_digest = hashlib.sha256(response.content).hexdigest()
+
+        if (stored_metadata or {}).get("payload-digest") == payload_digest:
+            print(f"ℹ️ Stored {data_type} for the following game id is up to date: `{game_id}`")
+            return "unchanged"
+
+        # original bytes are stored compressed, fixed mtime keeps the object identical for identical payloads
+        s3_client.put_object(
+            Bucket=DESTINATION_BUCKET,
+            Key=s3_key,
+            Body=gzip.compress(response.content, compresslevel=COMPRESS_LEVEL, mtime=0),
+            ContentEncoding=CONTENT_ENCODING,
+            ContentType="application/json",
+            Metadata={"payload-digest": payload_digest},
+        )
+        print(f"ℹ️ Saved {data_type} into `{DESTINATION_BUCKET}` bucket successfully!")
+
+        return "saved"
+
+    except Exception as exc:
+        return f"error: {exc}"
+
+
+def download_games(game_ids: List[str], skip_stored: bool = False) -> Dict[str, Dict[str, str]]:
+    """Download and save game data and shift charts of games concurrently in a bounded pool of workers.
+
+    Parameters:
+    -----------
+    game_ids: List[str]
+        A list of game IDs to download.
+    skip_stored: bool, optional
+        If True, data already stored in S3 bucket are not downloaded again. Default is False.
+
+    Returns:
+    --------
+    Dict[str, Dict[str, str]]
+        A dictionary mapping game ID to the outcome of each downloaded data type.
+    """
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        future_to_task = {
+            executor.submit(
+                download_and_save,
+                game_id=game_id,
+                url=url,
+                data_type=data_type,
+                s3_key=s3_key,
+                skip_stored=skip_stored,
+            ): (game_id, data_type)
+            for game_id in game_ids
+            for url, data_type, s3_key in get_download_tasks(game_id=game_id)
+        }
+
+    game_id_to_outcomes = {game_id: {} for game_id in game_ids}
+    for future, (game_id, data_type) in future_to_task.items():
+        game_id_to_outcomes[game_id][data_type] = future.result()
+
+    return game_id_to_outcomes
+
+
+def download_games_in_chunks(
+    game_ids: List[str], context: Any, skip_stored: bool = False
+) -> Tuple[Dict[str, Dict[str, str]], List[str]]:
+    """Download games chunk by chunk, until all games are downloaded, or the invocation runs out of time.
+
+    Parameters:
+    -----------
+    game_ids: List[str]
+        A list of game IDs to download.
+    context: Any
+        A Lambda context object, used to get the remaining time of the invocation.
+    skip_stored: bool, optional
+        If True, data already stored in S3 bucket are not downloaded again. Default is False.
+
+    Returns:
+    --------
+    Tuple[Dict[str, Dict[str, str]], List[str]]
+        A dictionary mapping game ID to the outcome of each downloaded data type, and a list of game IDs
+        that were NOT downloaded in time.
+    """
+    game_id_to_outcomes = {}
+
+    for chunk_start in range(0, len(game_ids), CHUNK_SIZE):
+        if context.get_remaining_time_in_millis() < MIN_REMAINING_TIME_MS:
+            return game_id_to_outcomes, game_ids[chunk_start:]
+
+        game_id_to_outcomes.update(
+            download_games(game_ids=game_ids[chunk_start : chunk_start + CHUNK_SIZE], skip_stored=skip_stored)
+        )
+
+    return game_id_to_outcomes, []
+
+
+def get_backfill_game_ids(event: dict) -> List[str]:
+    """Resolve a backfill event into IDs of finished games.
+
+    Parameters:
+    -----------
+    event: dict
+        A backfill event with `start_date` and `end_date` in ISO format, or with a list of `seasons`,
+        e.g. `["20232024"]`.
+
+    Returns:
+    --------
+    List[str]
+        A list containing IDs of finished games.
+    """
+    if "seasons" in event:
+        return [game_id for season in event["seasons"] for game_id in get_season_game_ids(season=season)]
+
+    return get_finished_game_ids(
+        start_date=datetime.date.fromisoformat(event["start_date"]),
+        end_date=datetime.date.fromisoformat(event.get("end_date", event["start_date"])),
+    )
+
+
+def invoke_self(context: Any, game_ids: List[str], overwrite: bool) -> None:
+    """Invoke the lambda function asynchronously to download a list of games.
+
+    Parameters:
+    -----------
+    context: Any
+        A Lambda context object, used to get the name of the function.
+    game_ids: List[str]
+        A list of game IDs to download.
+    overwrite: bool
+        If True, data already stored in S3 bucket are downloaded again.
+
+    Returns:
+    --------
+    None
+    """
+    lambda_client.invoke(
+        FunctionName=context.function_name,
+        InvocationType="Event",
+        Payload=json.dumps({"game_ids": game_ids, "overwrite": overwrite}).encode("UTF-8"),
+    )
+
+
+def poll_game(game_id: str, attempt: int) -> Dict[str, Dict[str, str]]:
+    """Download a game as soon as it is final, or schedule the next poll of the game.
+
+    Parameters:
+    -----------
+    game_id: str
+        A string representing the unique identifier of the game.
+    attempt: int
+        A number of the poll of the game, starting from 1.
+
+    Returns:
+    --------
+    Dict[str, Dict[str, str]]
+        A dictionary mapping game ID to the outcome of each downloaded data type, empty if the game
+        is not final yet.
+    """
+    game_state = get_game_state(game_id=game_id)
+
+    if game_state in ["OFF", "FINAL"]:
+        return download_games(game_ids=[game_id])
+
+    if attempt < MAX_POLL_ATTEMPTS:
+        schedule_game_poll(
+            game_id=game_id,
+            poll_at=datetime.datetime.now(tz=datetime.timezone.utc) + POLL_INTERVAL,
+            attempt=attempt + 1,
+        )
+        print(f"ℹ️ Game {game_id} is in state `{game_state}`, next poll scheduled in {POLL_INTERVAL}.")
+    else:
+        print(f"❌ Game {game_id} is still in state `{game_state}` after {attempt} polls, polling stopped.")
+
+    return {}
+
+
+def log_outcomes(game_id_to_outcomes: Dict[str, Dict[str, str]]) -> None:
+    """Print a summary of downloaded games.
+
+    Parameters:
+    -----------
+    game_id_to_outcomes: Dict[str, Dict[str, str]]
+        A dictionary mapping game ID to the outcome of each downloaded data type.
+
+    Returns:
+    --------
+    None
+    """
+    saved_games_cnt = 0
+    unchanged_games_cnt = 0
+    for game_id, outcomes in game_id_to_outcomes.items():
+        if all(outcome == "unchanged" for outcome in outcomes.values()):
+            unchanged_games_cnt += 1
+        elif all(outcome in ["saved", "unchanged"] for outcome in outcomes.values()):
+            saved_games_cnt += 1
+        else:
+            print(f"❌ Error: Game {game_id} was NOT downloaded completely: {outcomes}")
+
+    print(
+        f"✅ Game data and shift chart of {saved_games_cnt}/{len(game_id_to_outcomes)} games saved successfully, "
+        f"{unchanged_games_cnt} games unchanged!"
+    )
+
+
+def handler(event: dict, context: Any) -> Dict[str, Dict[str, str]]:
     """Download and save a game data and shift chart as JSON files based on the game ID.
 
+    By default, games finished within the last `LOOKBACK_DAYS` days are downloaded, so late finished
+    games, and later corrections are picked up. A backfill event
+    - with `start_date`/`end_date` or `seasons` is resolved into game IDs, that are split into
+      `BACKFILL_PARALLELISM` lists downloaded by parallel invocations,
+    - with `game_ids` downloads the games, games already stored are skipped unless `overwrite` is true,
+    - with `game_ids` and `poll_attempt` downloads a game as soon as it is final, it is sent by a poll
+      scheduled after the expected end of the game.
+    An invocation running out of time invokes the function again with the games left, so a backfill
+    is resumed until all games are downloaded.
+
     Parameters:
     -----------
     event: dict
@@ -31,46 +351,62 @@ def handler(event: dict, context: Any) -> None:
 
     Returns:
     --------
-    None
+    Dict[str, Dict[str, str]]
+        A dictionary mapping game ID to the outcome of each downloaded data type.
     """
-    yesterday_game_ids = get_yesterday_game_ids()
+    if "poll_attempt" in event:
+        game_id_to_outcomes = poll_game(game_id=str(event["game_ids"][0]), attempt=int(event["poll_attempt"]))
+        nhl_api.log_metrics()
+        if game_id_to_outcomes:
+            log_outcomes(game_id_to_outcomes=game_id_to_outcomes)
+        return game_id_to_outcomes
 
-    if not yesterday_game_ids:
-        print("❌ No game ids returned from NHL API.")
-        return
+    overwrite = bool(event.get("overwrite", False))
+    is_range_backfill = "game_ids" not in event and ("start_date" in event or "seasons" in event)
+
+    if "game_ids" in event:
+        candidate_game_ids = [str(game_id) for game_id in event["game_ids"]]
+    elif is_range_backfill:
+        candidate_game_ids = get_backfill_game_ids(event=event)
+    else:
+        candidate_game_ids = get_recent_game_ids(lookback_days=LOOKBACK_DAYS)
+        overwrite = True
 
-    for game_id in yesterday_game_ids:
-        season, season_type = extract_info_from(game_id=game_id)
+    if not candidate_game_ids:
+        print("❌ No game ids returned from NHL API.")
+        return {}
 
-        # download only regular season and play-off games
-        if season_type not in [
+    # download only regular season and play-off games
+    game_ids = [
+        game_id
+        for game_id in candidate_game_ids
+        if extract_info_from(game_id=game_id)[1]
+        in [
             SeasonType.REGULAR.name.lower(),
             SeasonType.PLAYOFF.name.lower(),
-        ]:
-            continue
-
-        # call NHL API endpoints
-        for url, data_type, s3_key in [
-            (
-                f"{URL_GAMECENTER}/{game_id}/play-by-play",
-                "game data",
-                f"games/{season}/{season_type}/{game_id}.json",
-            ),
-            (
-                f"{URL_SHIFTCHART}{game_id}",
-                "shift chart",
-                f"shift-charts/{season}/{season_type}/{game_id}.json",
-            ),
-        ]:
-            response = requests.get(url=url)
-
-            if response.ok:
-                print(f"ℹ️ Downloaded {data_type} for the following game id: `{game_id}`")
-                data = json.loads(response.text)
-
-                s3.Object(bucket_name=DESTINATION_BUCKET, key=s3_key).put(
-                    Body=(bytes(json.dumps(data).encode("UTF-8")))
-                )
-                print(f"ℹ️ Saved {data_type} into `{DESTINATION_BUCKET}` bucket successfully!")
-
-    print("✅ Game data and shift chart downloaded successfully!")
+        ]
+    ]
+
+    # fan out a date range or season backfill into parallel invocations
+    if is_range_backfill:
+        invocations_cnt = min(BACKFILL_PARALLELISM, len(game_ids))
+        for i in range(invocations_cnt):
+            invoke_self(context=context, game_ids=game_ids[i::invocations_cnt], overwrite=overwrite)
+
+        print(f"✅ Backfill of {len(game_ids)} games split into {invocations_cnt} parallel invocations!")
+        return {}
+
+    game_id_to_outcomes, remaining_game_ids = download_games_in_chunks(
+        game_ids=game_ids,
+        context=context,
+        skip_stored=not overwrite,
+    )
+
+    if remaining_game_ids:
+        invoke_self(context=context, game_ids=remaining_game_ids, overwrite=overwrite)
+        print(f"ℹ️ Invoked the function again to download {len(remaining_game_ids)} remaining games.")
+
+    nhl_api.log_metrics()
+    log_outcomes(game_id_to_outcomes=game_id_to_outcomes)
+
+    return game_id_to_outcomes
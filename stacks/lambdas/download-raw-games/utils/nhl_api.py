@@ -1,12 +1,12 @@
 """Util functions for lambda function."""
 
 import datetime
-import json
 from enum import Enum
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
-import requests
+from common.nhl_client import nhl_api
 
+URL_GAMECENTER = "https://api-web.nhle.com/v1/gamecenter"
 URL_SCHEDULE = "https://api-web.nhle.com/v1/schedule"
 
 
@@ -17,43 +17,109 @@ class SeasonType(Enum):
     ALLSTAR = 4
 
 
-def get_yesterday_date(date_format="%Y-%m-%d") -> str:
-    """Get yesterday's date in a specified format.
+def get_finished_game_ids(start_date: datetime.date, end_date: datetime.date) -> List[str]:
+    """Get IDs of finished games played within a date range.
 
     Parameters:
     -----------
-    date_format : str, optional
-        The format in which the date will be returned. Defaults to "%Y-%m-%d".
+    start_date : datetime.date
+        The first day of the date range.
+    end_date : datetime.date
+        The last day of the date range, inclusive.
 
     Returns:
     --------
-    str
-        A string representing yesterday's date in the specified format.
+    list
+        A list containing IDs of finished games played within the date range.
     """
-    yesterday_datetime = datetime.datetime.now() - datetime.timedelta(days=1)
-    return yesterday_datetime.strftime(format=date_format)
+    game_ids = []
+    week_start_date = start_date
+
+    # schedule endpoint returns a week of game days starting at the requested date
+    while week_start_date <= end_date:
+        schedule = nhl_api.get_json(url=f"{URL_SCHEDULE}/{week_start_date.isoformat()}")
+
+        if schedule is None:
+            print(f"❌ Error: Schedule for the week starting at {week_start_date} was NOT loaded!")
+        else:
+            game_ids += [
+                str(game.get("id"))
+                for game_day in schedule.get("gameWeek", [])
+                if start_date.isoformat() <= game_day.get("date") <= end_date.isoformat()
+                for game in game_day.get("games", [])
+                if game.get("gameState") in ["OFF", "FINAL"]
+            ]
+
+        week_start_date += datetime.timedelta(days=7)
+
+    return list(dict.fromkeys(game_ids))
+
+
+def get_season_game_ids(season: str) -> List[str]:
+    """Get IDs of finished games of a season.
+
+    Parameters:
+    -----------
+    season : str
+        A season, e.g. `20232024`.
+
+    Returns:
+    --------
+    list
+        A list containing IDs of finished games of the season.
+    """
+    season_first_year = int(season[:4])
+
+    # a season is played between September and the next September at the latest, games of adjacent
+    # seasons played in the same weeks are filtered out by the season in the game ID
+    game_ids = get_finished_game_ids(
+        start_date=datetime.date(season_first_year, 9, 1),
+        end_date=datetime.date(season_first_year + 1, 9, 30),
+    )
+
+    return [game_id for game_id in game_ids if game_id[:4] == season[:4]]
 
 
-def get_yesterday_game_ids() -> List[str]:
-    """Get IDs of finished games played yesterday.
+def get_recent_game_ids(lookback_days: int = 1) -> List[str]:
+    """Get IDs of finished games played within the last days, yesterday included.
+
+    Games that were finished late, or corrected by the league, are picked up again by looking back
+    more than a single day.
+
+    Parameters:
+    -----------
+    lookback_days : int, optional
+        A number of days to look back. Defaults to 1, i.e. yesterday only.
 
     Returns:
     --------
     list
-        A list containing IDs of finished games played yesterday.
+        A list containing IDs of finished games played within the last days.
     """
-    yesterday_date_str = get_yesterday_date()
-    response = requests.get(url=f"{URL_SCHEDULE}/{yesterday_date_str}")
-
-    if response.ok:
-        schedule = json.loads(response.text)
-
-        for game_day in schedule.get("gameWeek"):
-            if game_day.get("date") == yesterday_date_str:
-                return [
-                    str(game.get("id")) for game in game_day.get("games") if game.get("gameState") in ["OFF", "FINAL"]
-                ]
-    return []
+    yesterday_date = datetime.date.today() - datetime.timedelta(days=1)
+
+    return get_finished_game_ids(
+        start_date=yesterday_date - datetime.timedelta(days=lookback_days - 1),
+        end_date=yesterday_date,
+    )
+
+
+def get_game_state(game_id: str) -> Optional[str]:
+    """Get the state of a game, e.g. `LIVE`, `FINAL`, or `OFF`.
+
+    Parameters:
+    -----------
+    game_id : str
+        A string representing the unique identifier of a game.
+
+    Returns:
+    --------
+    str or None
+        The state of the game, or None if the game was NOT loaded.
+    """
+    game = nhl_api.get_json(url=f"{URL_GAMECENTER}/{game_id}/landing")
+
+    return game.get("gameState") if game is not None else None
 
 
 def extract_info_from(game_id: str) -> Tuple[str, str]:
@@ -1,18 +1,22 @@
 """
 Lambda function to download a games schedule for the next 7 days, and save it into S3 bucket as a PARQUET file.
+A poll of each scheduled game is scheduled after the expected end of the game, so the game is downloaded
+as soon as it is final, and live ingestion of the game is scheduled at its start.
 """
 
-import json
+import datetime
 import os
 from enum import Enum
 from typing import Any
 
 import boto3
 import pandas as pd
-import requests
+from common.nhl_client import nhl_api
+from common.scheduler import schedule_game_poll, schedule_live_game
 
 DESTINATION_BUCKET = os.environ["DESTINATION_BUCKET"]
 URL_SCHEDULE = "https://api-web.nhle.com/v1/schedule/now"
+EXPECTED_GAME_DURATION = datetime.timedelta(minutes=int(os.environ.get("EXPECTED_GAME_DURATION_MINUTES", 150)))
 
 s3 = boto3.resource("s3")
 
@@ -41,8 +45,10 @@ def handler(event: dict, context: Any) -> None:
     """
     try:
         # call NHL API
-        response = requests.get(url=URL_SCHEDULE)
-        schedule = json.loads(response.text)
+        schedule = nhl_api.get_json(url=URL_SCHEDULE)
+
+        if schedule is None:
+            raise RuntimeError("Schedule was NOT loaded!")
 
         # parse games from schedule
         games = [
@@ -80,5 +86,21 @@ def handler(event: dict, context: Any) -> None:
         pd.DataFrame(games).to_parquet(path=path, index=False)
         print(f"✅ Saved schedule into `{path}` successfully!")
 
+        # schedule live ingestion of games at their start, and polls of games after their expected end
+        scheduled_games_cnt = 0
+        for game in games:
+            if game["id"] is None or game["start_time_utc"] is None:
+                continue
+
+            game_id = str(game["id"])
+            start_at = datetime.datetime.fromisoformat(game["start_time_utc"].replace("Z", "+00:00"))
+            schedule_live_game(game_id=game_id, start_at=start_at)
+            scheduled_games_cnt += schedule_game_poll(game_id=game_id, poll_at=start_at + EXPECTED_GAME_DURATION)
+
+        print(f"✅ Scheduled polls of {scheduled_games_cnt} new games successfully!")
+
     except Exception as exc:
         print(f"❌ Internal server error: {exc}")
+
+    finally:
+        nhl_api.log_metrics()
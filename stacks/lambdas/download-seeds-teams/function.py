@@ -5,6 +5,7 @@ from typing import Any
 
 import boto3
 import pandas as pd
+from common.nhl_client import nhl_api
 from utils import get_current_standings
 
 DESTINATION_BUCKET = os.environ["DESTINATION_BUCKET"]
@@ -54,3 +55,6 @@ def handler(event: dict, context: Any) -> dict:
 
     except Exception as exc:
         print(f"❌ Internal server error: {exc}")
+
+    finally:
+        nhl_api.log_metrics()
@@ -1,28 +1,27 @@
 """Util functions for lambda function."""
 
-import json
+from typing import List
 
-import requests
+from common.nhl_client import nhl_api
 
 URL_STANDINGS = "https://api-web.nhle.com/v1/standings"
 
 
-def get_current_standings() -> dict:
+def get_current_standings() -> List[dict]:
     """Retrieve the current standings.
 
     Returns:
     --------
-    dict or None
-        A dictionary containing the current standings information if the request is successful.
-        Returns None if there are issues in retrieving the standings data.
+    list
+        A list containing the current standings of teams if the request is successful.
+        Returns an empty list if there are issues in retrieving the standings data.
     """
-    response = requests.get(url=f"{URL_STANDINGS}/now")
+    response = nhl_api.get_json(url=f"{URL_STANDINGS}/now")
 
-    if response.ok:
-        standings = json.loads(response.text).get("standings")
-        print("✅ Standings loaded successfully!")
-
-    else:
+    if response is None:
         print("❌ Error: Standings were NOT loaded!")
+        return []
+
+    print("✅ Standings loaded successfully!")
 
-    return standings
+    return response.get("standings", [])
@@ -0,0 +1,315 @@
+"""
+Command-line script that
+- reads JSON files with raw game data and shift charts from a local folder,
+- extracts base data with the same extractors as the transform-raw-to-base lambda function,
+- saves base data into PARQUET files, locally or into an object store (e.g. `s3://bucket`).
+
+Games are processed in parallel by a pool of processes, in chunks of consecutive raw files. Situation
+time of all games in a chunk is computed in a single vectorized call. Already processed games are skipped,
+so an interrupted backfill can be resumed by running the same command again.
+
+Example:
+    python backfill.py --input-folder /usr/src/app/data --output-location s3://bucket --seasons 2023
+"""
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pyarrow.parquet as pq
+from common.nhl_client import TokenBucket, nhl_api
+from pyarrow import fs
+from utils import (
+    GAME_DATA_KEYS,
+    SHIFT_CHART_DATA_KEYS,
+    GameInfo,
+    extract_info_from,
+    get_base_table,
+    get_game_data_base,
+    get_season_situation_time_base,
+    get_shift_chart_data_base,
+    load_raw_data,
+)
+
+# number of raw files processed by a worker at once
+CHUNK_SIZE = 50
+
+# situation time of games is computed per chunk of games, see `process_raw_files`
+RAW_FOLDER_NAME_TO_GET_BASE_FN = {
+    "games": partial(get_game_data_base, with_situation_time=False),
+    "shift-charts": get_shift_chart_data_base,
+}
+
+RAW_FOLDER_NAME_TO_KEYS = {
+    "games": GAME_DATA_KEYS,
+    "shift-charts": SHIFT_CHART_DATA_KEYS,
+}
+
+# the base table written last marks the raw file as processed
+RAW_FOLDER_NAME_TO_MARKER_FOLDER_NAME = {
+    "games": "games",
+    "shift-charts": "shifts",
+}
+
+
+def init_worker(workers: int) -> None:
+    """Split the NHL API rate limit between worker processes.
+
+    Every worker process has its own NHL API client, which requests players' stats of each game from
+    the boxscore endpoint. The rate of a single client is split, so all workers together do NOT exceed it.
+
+    Parameters:
+    -----------
+    workers: int
+        The number of worker processes.
+
+    Returns:
+    --------
+    None
+    """
+    nhl_api.rate_limiter = TokenBucket(
+        rate_per_second=nhl_api.rate_limiter.rate_per_second / workers,
+        capacity=max(1, nhl_api.rate_limiter.capacity // workers),
+    )
+
+
+def get_raw_file_paths(input_folder: Path, seasons: Optional[List[str]] = None) -> List[Tuple[str, Path]]:
+    """Find raw JSON files in the `<raw folder>/<season>/<season type>/<game id>.json` layout.
+
+    Parameters:
+    -----------
+    input_folder: Path
+        The folder with `games/` and, optionally, `shift-charts/` raw data folders.
+    seasons: List[str], optional
+        Starting years of seasons to process. All seasons are processed by default.
+
+    Returns:
+    --------
+    List[Tuple[str, Path]]
+        A list of (raw folder name, raw file path) tuples.
+    """
+    return [
+        (raw_folder_name, file_path)
+        for raw_folder_name in RAW_FOLDER_NAME_TO_GET_BASE_FN
+        for file_path in sorted((input_folder / raw_folder_name).glob("*/*/*.json"))
+        if seasons is None or file_path.parent.parent.name in seasons
+    ]
+
+
+def get_base_path(output_location: str, folder_name: str, game_info: GameInfo) -> str:
+    """Get the path of a base PARQUET file, in the same layout as the lambda function uses.
+
+    Parameters:
+    -----------
+    output_location: str
+        A local folder, or an object store URI, to save the base data into.
+    folder_name: str
+        A string that contains the name of the folder to save the base data.
+    game_info: GameInfo
+        A GameInfo object that contains the game information.
+
+    Returns:
+    --------
+    str
+    """
+    key = f"{folder_name}/{game_info.season}/{game_info.season_type}/{game_info.game_id}.parquet"
+    return f"{output_location.rstrip('/')}/{key}"
+
+
+def process_raw_files(raw_folder_name: str, file_paths: List[Path], output_location: str, overwrite: bool) -> List[str]:
+    """Transform a chunk of raw JSON files into base PARQUET files.
+
+    Situation time of all games in the chunk is computed in a single vectorized call, and split by game ID.
+
+    Parameters:
+    -----------
+    raw_folder_name: str
+        A string that contains the name of the raw data folder, `games` or `shift-charts`.
+    file_paths: List[Path]
+        The paths of the raw JSON files.
+    output_location: str
+        A local folder, or an object store URI, to save the base data into.
+    overwrite: bool
+        If True, already processed raw files are processed again.
+
+    Returns:
+    --------
+    List[str]
+        A status of each raw file, `skipped`, `processed` or `failed`.
+    """
+    filesystem, output_root = fs.FileSystem.from_uri(output_location)
+    marker_folder_name = RAW_FOLDER_NAME_TO_MARKER_FOLDER_NAME[raw_folder_name]
+    statuses = []
+    raws = []
+    game_info_to_base = {}
+
+    for file_path in file_paths:
+        game_info = extract_info_from(key=file_path.name)
+        marker_path = get_base_path(output_location=output_root, folder_name=marker_folder_name, game_info=game_info)
+
+        if not overwrite and filesystem.get_file_info(marker_path).type != fs.FileType.NotFound:
+            statuses.append("skipped")
+            continue
+
+        try:
+            raw = load_raw_data(
+                body=file_path.read_bytes(),
+                keys=RAW_FOLDER_NAME_TO_KEYS[raw_folder_name],
+                name=file_path.name,
+            )
+            game_info_to_base[game_info] = RAW_FOLDER_NAME_TO_GET_BASE_FN[raw_folder_name](raw)
+            raws.append(raw)
+            statuses.append("processed")
+        except Exception as exc:
+            statuses.append("failed")
+            print(f"❌ Error: `{file_path}` was NOT transformed: {exc}")
+
+    if raw_folder_name == "games":
+        game_id_to_situation_time = {}
+        for row in get_season_situation_time_base(games=raws):
+            game_id_to_situation_time.setdefault(row["game_id"], []).append(row)
+
+        for game, folder_name_to_base in zip(raws, game_info_to_base.values()):
+            folder_name_to_base["situation-time"] = game_id_to_situation_time.get(game.get("id"), [])
+
+    for game_info, folder_name_to_base in game_info_to_base.items():
+        # save the marker table last, so a partially processed raw file is processed again on resume
+        for folder_name in sorted(folder_name_to_base, key=lambda folder_name: folder_name == marker_folder_name):
+            base = folder_name_to_base[folder_name]
+
+            if base:
+                path = get_base_path(output_location=output_root, folder_name=folder_name, game_info=game_info)
+                filesystem.create_dir(path.rsplit("/", 1)[0], recursive=True)
+                pq.write_table(
+                    table=get_base_table(base=base, folder_name=folder_name),
+                    where=path,
+                    filesystem=filesystem,
+                )
+
+    return statuses
+
+
+def get_chunks(raw_file_paths: List[Tuple[str, Path]]) -> List[Tuple[str, List[Path]]]:
+    """Split raw file paths into chunks of at most `CHUNK_SIZE` files of the same raw data folder.
+
+    Parameters:
+    -----------
+    raw_file_paths: List[Tuple[str, Path]]
+        A list of (raw folder name, raw file path) tuples, see `get_raw_file_paths`.
+
+    Returns:
+    --------
+    List[Tuple[str, List[Path]]]
+        A list of (raw folder name, raw file paths) tuples.
+    """
+    raw_folder_name_to_file_paths = {}
+    for raw_folder_name, file_path in raw_file_paths:
+        raw_folder_name_to_file_paths.setdefault(raw_folder_name, []).append(file_path)
+
+    return [
+        (raw_folder_name, file_paths[i : i + CHUNK_SIZE])
+        for raw_folder_name, file_paths in raw_folder_name_to_file_paths.items()
+        for i in range(0, len(file_paths), CHUNK_SIZE)
+    ]
+
+
+def backfill(
+    input_folder: Path,
+    output_location: str,
+    seasons: Optional[List[str]] = None,
+    workers: Optional[int] = None,
+    overwrite: bool = False,
+) -> Dict[str, int]:
+    """Transform all raw JSON files in a folder into base PARQUET files in parallel.
+
+    Parameters:
+    -----------
+    input_folder: Path
+        The folder with `games/` and, optionally, `shift-charts/` raw data folders.
+    output_location: str
+        A local folder, or an object store URI, to save the base data into.
+    seasons: List[str], optional
+        Starting years of seasons to process. All seasons are processed by default.
+    workers: int, optional
+        The number of worker processes, the NHL API rate limit is split between them. Defaults to the number
+        of CPUs.
+    overwrite: bool, optional
+        If True, already processed raw files are processed again. Defaults to False.
+
+    Returns:
+    --------
+    Dict[str, int]
+        A dictionary mapping a status to the number of raw files with that status.
+    """
+    raw_file_paths = get_raw_file_paths(input_folder=input_folder, seasons=seasons)
+    if "://" not in output_location:
+        output_location = Path(output_location).resolve().as_posix()
+
+    workers = workers or os.cpu_count()
+    status_to_cnt = {"processed": 0, "skipped": 0, "failed": 0}
+    print(f"ℹ️ Found {len(raw_file_paths)} raw files in `{input_folder}`")
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(workers,)) as executor:
+        future_to_chunk = {
+            executor.submit(
+                process_raw_files,
+                raw_folder_name=raw_folder_name,
+                file_paths=file_paths,
+                output_location=output_location,
+                overwrite=overwrite,
+            ): file_paths
+            for raw_folder_name, file_paths in get_chunks(raw_file_paths=raw_file_paths)
+        }
+
+        done_cnt = 0
+        for future in as_completed(future_to_chunk):
+            file_paths = future_to_chunk[future]
+
+            try:
+                statuses = future.result()
+            except Exception as exc:
+                statuses = ["failed"] * len(file_paths)
+                print(f"❌ Error: `{file_paths[0]}` - `{file_paths[-1]}` were NOT transformed: {exc}")
+
+            for status in statuses:
+                status_to_cnt[status] += 1
+
+            # progress is logged roughly every 100 raw files
+            if (done_cnt + len(file_paths)) // 100 > done_cnt // 100:
+                print(f"ℹ️ {done_cnt + len(file_paths)}/{len(raw_file_paths)} raw files done: {status_to_cnt}")
+            done_cnt += len(file_paths)
+
+    return status_to_cnt
+
+
+def main() -> None:
+    """Parse command-line arguments, and backfill base data.
+
+    Returns
+    -------
+        None
+    """
+    parser = argparse.ArgumentParser(description="Transform local raw games data into base data.")
+    parser.add_argument("--input-folder", type=Path, required=True, help="Folder with `games/` raw data folder.")
+    parser.add_argument("--output-location", required=True, help="Local folder, or URI such as `s3://bucket`.")
+    parser.add_argument("--seasons", nargs="*", default=None, help="Starting years of seasons, e.g. `2023`.")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes.")
+    parser.add_argument("--overwrite", action="store_true", help="Process already processed games again.")
+    args = parser.parse_args()
+
+    status_to_cnt = backfill(
+        input_folder=args.input_folder,
+        output_location=args.output_location,
+        seasons=args.seasons,
+        workers=args.workers,
+        overwrite=args.overwrite,
+    )
+
+    print(f"🎉 Backfill finished: {status_to_cnt}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,35 +3,47 @@ Lambda function that
 - reads JSON file with raw game data,
 - extracts base info about game, and events,
 - saves base data into PARQUET files.
+
+In live mode, it polls play-by-play of a game in progress, and appends new events to the base data.
 """
 
-import json
-import os
-from typing import Any
-
-import boto3
-import pandas as pd
-from utils import (
-    GameInfo,
-    extract_info_from,
-    get_faceoff_base,
-    get_game_base,
-    get_hit_base,
-    get_penalty_base,
-    get_player_base,
-    get_possession_change_base,
-    get_shift_base,
-    get_shot_base,
-    get_situation_time_base,
-)
+import time
+
+# the init start is taken before the other imports, so the init duration metric includes them
+INIT_START = time.perf_counter()
+
+import gzip  # noqa: E402
+import json  # noqa: E402
+import os  # noqa: E402
+from concurrent.futures import ThreadPoolExecutor  # noqa: E402
+from typing import Any, Dict, Iterable, List, Optional  # noqa: E402
+
+from utils.metrics import emit_import_duration_metrics, emit_metric, timed_import  # noqa: E402
+
+with timed_import(name="boto3"):
+    import boto3  # noqa: E402
+    from botocore.config import Config  # noqa: E402
+
+from utils import GameInfo, extract_info_from  # noqa: E402
+from utils.manifest import is_changed, is_transformed, save_manifest_entry  # noqa: E402
 
 DESTINATION_BUCKET = os.environ["DESTINATION_BUCKET"]
+MAX_UPLOAD_WORKERS = int(os.environ.get("MAX_UPLOAD_WORKERS", 8))
+LIVE_POLL_INTERVAL_SECONDS = int(os.environ.get("LIVE_POLL_INTERVAL_SECONDS", 15))
+LIVE_MAX_DURATION_SECONDS = 6 * 60 * 60
+LIVE_MIN_REMAINING_TIME_MS = 60 * 1000
+LIVE_MAX_ERRORS_CNT = 10
 
 s3 = boto3.resource("s3")
+s3_client = boto3.client("s3", config=Config(max_pool_connections=MAX_UPLOAD_WORKERS))
+lambda_client = boto3.client("lambda")
 
+INIT_DURATION_MS = (time.perf_counter() - INIT_START) * 1000
+is_cold_start = True
 
-def load_s3_object_to_dict(bucket_name: str, key: str) -> dict:
-    """Load S3 object to dictionary.
+
+def load_s3_object_to_dict(bucket_name: str, key: str, keys: Optional[Iterable[str]] = None) -> dict:
+    """Load S3 object to dictionary, a gzip compressed object is decompressed while it is read.
 
     Parameters:
     -----------
@@ -39,17 +51,29 @@ def load_s3_object_to_dict(bucket_name: str, key: str) -> dict:
         A string that contains the name of the bucket to load the S3 object from.
     key: str
         A string that contains the key of the S3 object to load.
+    keys: Iterable[str], optional
+        Top-level keys of the S3 object to keep. All keys are kept by default.
 
     Returns:
     --------
     dict
         A dictionary that contains the contents of the S3 object.
     """
-    return json.loads(s3.Object(bucket_name=bucket_name, key=key).get()["Body"].read().decode("utf-8"))
+    from utils import load_raw_data
+
+    s3_object = s3.Object(bucket_name=bucket_name, key=key).get()
 
+    if s3_object.get("ContentEncoding") == "gzip":
+        with gzip.GzipFile(fileobj=s3_object["Body"]) as file:
+            body = file.read()
+    else:
+        body = s3_object["Body"].read()
 
-def save_base_data(base: list, folder_name: str, game_info: GameInfo) -> None:
-    """Save base data.
+    return load_raw_data(body=body, keys=keys, name=f"`{bucket_name}/{key}`")
+
+
+def save_base_table(base: list, folder_name: str, game_info: GameInfo, key_suffix: str = "") -> None:
+    """Serialize base data into a PARQUET file, and upload it into the destination bucket.
 
     Parameters:
     -----------
@@ -59,19 +83,71 @@ def save_base_data(base: list, folder_name: str, game_info: GameInfo) -> None:
         A string that contains the name of the folder to save the base data.
     game_info: GameInfo
         A GameInfo object that contains the game information.
+    key_suffix: str, optional
+        A suffix of the file name, e.g. of a live increment. Empty by default.
 
     Returns:
     --------
     None
     """
-    key = f"{folder_name}/{game_info.season}/{game_info.season_type}/{game_info.game_id}.parquet"
+    key = f"{folder_name}/{game_info.season}/{game_info.season_type}/{game_info.game_id}{key_suffix}.parquet"
 
     if base:
-        pd.DataFrame(base).to_parquet(path=f"s3://{DESTINATION_BUCKET}/{key}", index=False)
+        with timed_import(name="pyarrow"):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        from utils import get_base_table
+
+        buffer = pa.BufferOutputStream()
+        pq.write_table(table=get_base_table(base=base, folder_name=folder_name), where=buffer)
+        s3_client.put_object(Bucket=DESTINATION_BUCKET, Key=key, Body=buffer.getvalue().to_pybytes())
         print(f"ℹ️ Saved `{DESTINATION_BUCKET}/{key}` successfully!")
 
 
-def process_game_data(bucket_name: str, key: str, game_info: GameInfo) -> None:
+def save_base_data(folder_name_to_base: Dict[str, List[dict]], game_info: GameInfo, key_suffix: str = "") -> None:
+    """Save base data, the tables are uploaded concurrently over a shared S3 client.
+
+    Parameters:
+    -----------
+    folder_name_to_base: Dict[str, List[dict]]
+        A dictionary mapping the name of the folder to save the base data to the base data.
+    game_info: GameInfo
+        A GameInfo object that contains the game information.
+    key_suffix: str, optional
+        A suffix of the file names, e.g. of a live increment. Empty by default.
+
+    Returns:
+    --------
+    None
+
+    Raises:
+    -------
+    RuntimeError
+        If any of the tables failed to upload, after all the other tables were uploaded.
+    """
+    with ThreadPoolExecutor(max_workers=MAX_UPLOAD_WORKERS) as executor:
+        folder_name_to_future = {
+            folder_name: executor.submit(
+                save_base_table,
+                base=base,
+                folder_name=folder_name,
+                game_info=game_info,
+                key_suffix=key_suffix,
+            )
+            for folder_name, base in folder_name_to_base.items()
+        }
+
+    failed_folder_names = []
+    for folder_name, future in folder_name_to_future.items():
+        if future.exception() is not None:
+            print(f"❌ Error: `{folder_name}` of the game {game_info.game_id} was NOT saved: {future.exception()}")
+            failed_folder_names.append(folder_name)
+
+    if failed_folder_names:
+        raise RuntimeError(f"Failed to save {', '.join(failed_folder_names)} of the game {game_info.game_id}")
+
+
+def process_game_data(bucket_name: str, key: str, game_info: GameInfo, is_raw_changed: bool = False) -> None:
     """Process game data.
 
     Parameters:
@@ -82,27 +158,26 @@ def process_game_data(bucket_name: str, key: str, game_info: GameInfo) -> None:
         A string that contains the key of the S3 object to load.
     game_info: GameInfo
         A GameInfo object that contains the game information.
+    is_raw_changed: bool, optional
+        True if the game data changed since they were transformed, e.g. corrected stats. False by default.
 
     Returns:
     --------
     None
     """
-    game = load_s3_object_to_dict(bucket_name=bucket_name, key=key)
+    from utils import GAME_DATA_KEYS, get_game_data_base
+    from utils.player import invalidate_cached_game_logs
+
+    game = load_s3_object_to_dict(bucket_name=bucket_name, key=key, keys=GAME_DATA_KEYS)
     print(f"ℹ️ Loaded raw data from `{bucket_name}/{key}`")
 
-    # save base data
-    for folder_name, fn in [
-        ("games", get_game_base),
-        ("shots", get_shot_base),
-        ("faceoffs", get_faceoff_base),
-        ("hits", get_hit_base),
-        ("possession-changes", get_possession_change_base),
-        ("penalties", get_penalty_base),
-        ("players", get_player_base),
-        ("situation-time", get_situation_time_base),
-    ]:
-        base = fn(game=game)
-        save_base_data(base=base, folder_name=folder_name, game_info=game_info)
+    # game logs of the players of changed game data are stale, e.g. after a stats correction
+    if is_raw_changed:
+        invalidate_cached_game_logs(game=game)
+
+    # save base data, live increments of the game are replaced by it
+    save_base_data(folder_name_to_base=get_game_data_base(game=game), game_info=game_info)
+    delete_live_base_tables(game_info=game_info)
 
 
 def process_shift_chart_data(bucket_name: str, key: str, game_info: GameInfo) -> None:
@@ -121,19 +196,221 @@ def process_shift_chart_data(bucket_name: str, key: str, game_info: GameInfo) ->
     --------
     None
     """
-    shift_chart = load_s3_object_to_dict(bucket_name=bucket_name, key=key)
+    from utils import SHIFT_CHART_DATA_KEYS, get_shift_chart_data_base
+
+    shift_chart = load_s3_object_to_dict(bucket_name=bucket_name, key=key, keys=SHIFT_CHART_DATA_KEYS)
     print(f"ℹ️ Loaded raw data from `{bucket_name}/{key}`")
 
     # save base data
-    for folder_name, fn in [
-        ("shifts", get_shift_base),
-    ]:
-        base = fn(shift_chart=shift_chart)
-        save_base_data(base=base, folder_name=folder_name, game_info=game_info)
+    save_base_data(folder_name_to_base=get_shift_chart_data_base(shift_chart=shift_chart), game_info=game_info)
+
+
+def process_s3_record(s3_record: dict) -> None:
+    """Transform a raw file referenced by an S3 event notification record into base data.
+
+    Parameters:
+    -----------
+    s3_record: dict
+        A dictionary that contains a single S3 event notification record.
+
+    Returns:
+    --------
+    None
+    """
+    input_file_bucket = s3_record.get("s3").get("bucket").get("name")
+    input_file_key = s3_record.get("s3").get("object").get("key")
+    game_info = extract_info_from(key=input_file_key)
+
+    if input_file_key.startswith("games/"):
+        process_fn = process_game_data
+    elif input_file_key.startswith("shift-charts/"):
+        process_fn = process_shift_chart_data
+    else:
+        print(f"❌ Invalid file key: {input_file_key}")
+        return
+
+    # skip raw data with unchanged content, already transformed by the current extractors
+    raw_digest = get_raw_digest(s3_record=s3_record)
+    if is_transformed(bucket_name=DESTINATION_BUCKET, key=input_file_key, raw_digest=raw_digest):
+        print(f"ℹ️ Raw data `{input_file_key}` unchanged since last transformation, skipped.")
+
+        # live increments left by a live ingestion that stopped are replaced by the stored base data
+        if process_fn is process_game_data:
+            delete_live_base_tables(game_info=game_info)
+        return
+
+    if process_fn is process_game_data:
+        process_game_data(
+            bucket_name=input_file_bucket,
+            key=input_file_key,
+            game_info=game_info,
+            is_raw_changed=is_changed(bucket_name=DESTINATION_BUCKET, key=input_file_key, raw_digest=raw_digest),
+        )
+    else:
+        process_fn(bucket_name=input_file_bucket, key=input_file_key, game_info=game_info)
+    save_manifest_entry(bucket_name=DESTINATION_BUCKET, key=input_file_key, raw_digest=raw_digest)
+
+    print(f"✅ Raw data `{input_file_key}` transformed into base successfully!")
+
+
+def get_raw_digest(s3_record: dict) -> str:
+    """Get a digest of the raw file content referenced by an S3 event notification record.
+
+    The ETag of the S3 object is used, it is the MD5 digest of the content for objects uploaded
+    in a single part.
+
+    Parameters:
+    -----------
+    s3_record: dict
+        A dictionary that contains a single S3 event notification record.
+
+    Returns:
+    --------
+    str
+    """
+    s3_object = s3_record.get("s3").get("object")
+
+    if s3_object.get("eTag"):
+        return s3_object.get("eTag").strip('"')
+
+    return (
+        s3_client.head_object(Bucket=s3_record.get("s3").get("bucket").get("name"), Key=s3_object.get("key"))
+        .get("ETag")
+        .strip('"')
+    )
+
+
+def delete_live_base_tables(game_info: GameInfo) -> None:
+    """Delete live increments of a game from the destination bucket.
 
+    Parameters:
+    -----------
+    game_info: GameInfo
+        A GameInfo object that contains the game information.
 
-def handler(event: dict, context: Any) -> None:
-    """Read JSON file with raw game data, extract base info, and save data into PARQUET files.
+    Returns:
+    --------
+    None
+    """
+    from utils.live import LIVE_FOLDER_NAMES
+
+    for folder_name in LIVE_FOLDER_NAMES:
+        prefix = f"{folder_name}/{game_info.season}/{game_info.season_type}/{game_info.game_id}-live-"
+        keys = [
+            {"Key": s3_object["Key"]}
+            for page in s3_client.get_paginator("list_objects_v2").paginate(Bucket=DESTINATION_BUCKET, Prefix=prefix)
+            for s3_object in page.get("Contents", [])
+        ]
+
+        if keys:
+            s3_client.delete_objects(Bucket=DESTINATION_BUCKET, Delete={"Objects": keys})
+            print(f"ℹ️ Deleted {len(keys)} live increments of `{folder_name}` of the game {game_info.game_id}")
+
+
+def process_live_game(event: dict, context: Any) -> None:
+    """Poll play-by-play of a game in progress, and append new events to the base data.
+
+    Only the plays newer than the checkpoint are extracted, and saved as a live increment of shots,
+    penalties, faceoffs, and hits. When the game is final, the final snapshot of all base tables is
+    saved, and the live increments are deleted. An invocation running out of time invokes the function
+    again with the checkpoint. A failed poll is logged and retried from the checkpoint by the next poll,
+    so the failure does not make Lambda retry the whole invocation from the start.
+
+    Parameters:
+    -----------
+    event: dict
+        A live event with `live_game_id`, and optionally `checkpoint` and `started_at` of a previous
+        invocation.
+    context: Any
+        A Lambda context object, used to get the remaining time of the invocation.
+
+    Returns:
+    --------
+    None
+    """
+    from utils import get_game_data_base
+    from utils.live import FINAL_GAME_STATES, get_live_events_base, get_live_game
+
+    game_id = str(event["live_game_id"])
+    checkpoint = int(event.get("checkpoint", -1))
+    started_at = float(event.get("started_at", time.time()))
+    game_info = extract_info_from(key=game_id)
+
+    errors_cnt = 0
+    while time.time() - started_at < LIVE_MAX_DURATION_SECONDS:
+        try:
+            game = get_live_game(game_id=game_id)
+
+            if game is not None and game.get("gameState") in FINAL_GAME_STATES:
+                save_base_data(folder_name_to_base=get_game_data_base(game=game), game_info=game_info)
+                delete_live_base_tables(game_info=game_info)
+                print(f"✅ Final snapshot of the game {game_id} saved successfully!")
+                return
+
+            if game is not None:
+                folder_name_to_base, new_checkpoint = get_live_events_base(game=game, checkpoint=checkpoint)
+
+                if new_checkpoint > checkpoint:
+                    save_base_data(
+                        folder_name_to_base=folder_name_to_base,
+                        game_info=game_info,
+                        key_suffix=f"-live-{new_checkpoint:06d}",
+                    )
+                    checkpoint = new_checkpoint
+
+            errors_cnt = 0
+
+        except Exception as exc:
+            errors_cnt += 1
+            print(f"❌ Error: Poll of the live game {game_id} failed at checkpoint {checkpoint}: {exc}")
+
+            if errors_cnt >= LIVE_MAX_ERRORS_CNT:
+                print(f"❌ Live game {game_id} failed {errors_cnt} polls in a row, polling stopped.")
+                return
+
+        if context.get_remaining_time_in_millis() < LIVE_MIN_REMAINING_TIME_MS:
+            lambda_client.invoke(
+                FunctionName=context.function_name,
+                InvocationType="Event",
+                Payload=json.dumps(
+                    {"live_game_id": game_id, "checkpoint": checkpoint, "started_at": started_at}
+                ).encode("UTF-8"),
+            )
+            print(f"ℹ️ Live game {game_id} continues in a new invocation from checkpoint {checkpoint}.")
+            return
+
+        time.sleep(LIVE_POLL_INTERVAL_SECONDS)
+
+    print(f"❌ Live game {game_id} is not final after {LIVE_MAX_DURATION_SECONDS} seconds, polling stopped.")
+
+
+def get_s3_records(record: dict) -> List[dict]:
+    """Get S3 event notification records from an event record.
+
+    The event record is either an S3 event notification record itself, or an SQS message with
+    S3 event notification in its body.
+
+    Parameters:
+    -----------
+    record: dict
+        A dictionary that contains a single event record.
+
+    Returns:
+    --------
+    List[dict]
+    """
+    if record.get("eventSource") == "aws:sqs":
+        return json.loads(record.get("body")).get("Records", [])
+
+    return [record]
+
+
+def handler(event: dict, context: Any) -> dict:
+    """Read JSON files with raw game data, extract base info, and save data into PARQUET files.
+
+    Every record of the event is processed, either S3 event notifications, or SQS messages with
+    S3 event notifications. Failed SQS messages are reported back, so only they are retried.
+    A live event with `live_game_id` polls the game in progress instead, see `process_live_game`.
 
     Parameters:
     -----------
@@ -145,22 +422,36 @@ def handler(event: dict, context: Any) -> None:
 
     Returns:
     --------
-    None
+    dict
+        A dictionary with the message IDs of failed SQS messages.
     """
-    try:
-        input_file_bucket = event.get("Records")[0].get("s3").get("bucket").get("name")
-        input_file_key = event.get("Records")[0].get("s3").get("object").get("key")
-        game_info = extract_info_from(key=input_file_key)
-
-        if input_file_key.startswith("games/"):
-            process_game_data(bucket_name=input_file_bucket, key=input_file_key, game_info=game_info)
-        elif input_file_key.startswith("shift-charts/"):
-            process_shift_chart_data(bucket_name=input_file_bucket, key=input_file_key, game_info=game_info)
-        else:
-            print(f"❌ Invalid file key: {input_file_key}")
-            return
+    global is_cold_start
+
+    batch_item_failures = []
+
+    if "live_game_id" in event:
+        process_live_game(event=event, context=context)
+
+    for record in event.get("Records", []):
+        try:
+            for s3_record in get_s3_records(record=record):
+                process_s3_record(s3_record=s3_record)
+
+        except Exception as exc:
+            print(f"❌ Internal server error: {exc}")
+
+            if record.get("messageId") is not None:
+                batch_item_failures.append({"itemIdentifier": record.get("messageId")})
+
+    # report NHL API metrics of live polling and game log downloads
+    from common.nhl_client import nhl_api
+
+    nhl_api.log_metrics()
 
-        print("✅ Raw data transformed into base successfully!")
+    # report init duration once per execution environment, and imports deferred into invocations
+    if is_cold_start:
+        emit_metric(name="InitDuration", value=INIT_DURATION_MS)
+        is_cold_start = False
+    emit_import_duration_metrics()
 
-    except Exception as exc:
-        print(f"❌ Internal server error: {exc}")
+    return {"batchItemFailures": batch_item_failures}
@@ -1,16 +1,43 @@
+import importlib
 from enum import Enum
 from pathlib import Path
+from typing import NamedTuple
 
-from pydantic import BaseModel
-from utils.faceoff import get_faceoff_base
-from utils.game import get_game_base
-from utils.hit import get_hit_base
-from utils.penalty import get_penalty_base
-from utils.player import get_player_base
-from utils.possession_change import get_possession_change_base
-from utils.shift import get_shift_base
-from utils.shot import get_shot_base
-from utils.situation_time import get_situation_time_base
+from utils.metrics import timed_import
+
+# extractors are imported lazily on first access, so the lambda function does not pay for importing
+# heavy dependencies (numpy, pyarrow, requests) during cold start when they are not needed
+NAME_TO_MODULE_NAME = {
+    "GAME_DATA_KEYS": "utils.extract",
+    "SHIFT_CHART_DATA_KEYS": "utils.extract",
+    "get_base_table": "utils.schemas",
+    "get_events_base": "utils.events",
+    "get_faceoff_base": "utils.faceoff",
+    "get_game_base": "utils.game",
+    "get_game_data_base": "utils.extract",
+    "get_hit_base": "utils.hit",
+    "get_penalty_base": "utils.penalty",
+    "get_player_base": "utils.player",
+    "get_possession_change_base": "utils.possession_change",
+    "get_shift_base": "utils.shift",
+    "get_shift_chart_data_base": "utils.extract",
+    "get_season_situation_time_base": "utils.situation_time",
+    "get_shot_base": "utils.shot",
+    "get_situation_time_base": "utils.situation_time",
+    "load_raw_data": "utils.loader",
+}
+
+
+def __getattr__(name: str):
+    if name not in NAME_TO_MODULE_NAME:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    with timed_import(name=NAME_TO_MODULE_NAME[name]):
+        module = importlib.import_module(NAME_TO_MODULE_NAME[name])
+
+    globals()[name] = getattr(module, name)
+
+    return globals()[name]
 
 
 class SeasonType(Enum):
@@ -20,7 +47,7 @@ class SeasonType(Enum):
     ALLSTAR = 4
 
 
-class GameInfo(BaseModel):
+class GameInfo(NamedTuple):
     game_id: str
     season: str
     season_type: str
@@ -55,14 +82,7 @@ def extract_info_from(key: str) -> GameInfo:
 
 
 __all__ = [
+    "GameInfo",
     "extract_info_from",
-    "get_faceoff_base",
-    "get_game_base",
-    "get_hit_base",
-    "get_penalty_base",
-    "get_player_base",
-    "get_possession_change_base",
-    "get_shot_base",
-    "get_situation_time_base",
-    "get_shift_base",
+    *NAME_TO_MODULE_NAME,
 ]
@@ -0,0 +1,78 @@
+"""Single-pass events features extraction."""
+
+from typing import Callable, Dict, List
+
+from utils.faceoff import FACEOFF_EVENT_TYPES, get_faceoff_features
+from utils.general import get_general_game_features
+from utils.hit import HIT_EVENT_TYPES, get_hit_features
+from utils.penalty import PENALTY_EVENT_TYPES, get_penalty_features
+from utils.possession_change import (
+    POSSESSION_CHANGE_EVENT_TYPES,
+    get_possession_change_features,
+)
+from utils.shot import SHOT_EVENT_TYPES, get_shot_features
+from utils.situation_time import get_situation, get_situation_time_features
+
+FOLDER_NAME_TO_EVENT_TYPES = {
+    "shots": SHOT_EVENT_TYPES,
+    "faceoffs": FACEOFF_EVENT_TYPES,
+    "hits": HIT_EVENT_TYPES,
+    "possession-changes": POSSESSION_CHANGE_EVENT_TYPES,
+    "penalties": PENALTY_EVENT_TYPES,
+}
+
+FOLDER_NAME_TO_FEATURES_FN: Dict[str, Callable[..., dict]] = {
+    "shots": get_shot_features,
+    "faceoffs": get_faceoff_features,
+    "hits": get_hit_features,
+    "possession-changes": get_possession_change_features,
+    "penalties": get_penalty_features,
+}
+
+EVENT_TYPE_TO_FOLDER_NAME = {
+    event_type: folder_name
+    for folder_name, event_types in FOLDER_NAME_TO_EVENT_TYPES.items()
+    for event_type in event_types
+}
+
+
+def get_events_base(game: dict, with_situation_time: bool = True) -> Dict[str, List[dict]]:
+    """Extract all event based tables from a game dictionary in a single pass over its plays.
+
+    Each play is routed by its `typeDescKey` to the matching table, and the situation of every play
+    is collected on the way for the situation time table. General game features are computed only
+    once per game.
+
+    Parameters:
+    -----------
+    game : dict
+        A dictionary containing game information.
+    with_situation_time : bool, optional
+        If False, the situation time table is not extracted, e.g. when it is computed for multiple games
+        at once by `get_season_situation_time_base`. Defaults to True.
+
+    Returns:
+    --------
+    Dict[str, List[dict]]
+        A dictionary mapping the base folder name to its rows.
+    """
+    game_features = get_general_game_features(game=game)
+    folder_name_to_base = {folder_name: [] for folder_name in FOLDER_NAME_TO_EVENT_TYPES}
+    situations = []
+
+    for event in game.get("plays", []):
+        situations.append(get_situation(event=event))
+
+        folder_name = EVENT_TYPE_TO_FOLDER_NAME.get(event.get("typeDescKey"))
+        if folder_name is not None:
+            folder_name_to_base[folder_name].append(
+                FOLDER_NAME_TO_FEATURES_FN[folder_name](event=event, game_features=game_features)
+            )
+
+    if with_situation_time:
+        folder_name_to_base["situation-time"] = get_situation_time_features(
+            game_features=game_features,
+            situations=situations,
+        )
+
+    return folder_name_to_base
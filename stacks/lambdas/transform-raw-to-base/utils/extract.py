@@ -0,0 +1,65 @@
+"""Base data extraction from raw data."""
+
+from typing import Dict, List
+
+from utils.events import get_events_base
+from utils.game import get_game_base
+from utils.player import get_player_base
+from utils.shift import get_shift_base
+
+# top-level keys of raw data used by the extractors
+GAME_DATA_KEYS = (
+    "id",
+    "season",
+    "gameType",
+    "gameDate",
+    "startTimeUTC",
+    "venue",
+    "periodDescriptor",
+    "awayTeam",
+    "homeTeam",
+    "plays",
+    "rosterSpots",
+)
+SHIFT_CHART_DATA_KEYS = ("data",)
+
+
+def get_game_data_base(game: dict, with_situation_time: bool = True) -> Dict[str, List[dict]]:
+    """Extract all base tables from a game dictionary.
+
+    Parameters:
+    -----------
+    game : dict
+        A dictionary containing raw game information.
+    with_situation_time : bool, optional
+        If False, the situation time table is not extracted. Defaults to True.
+
+    Returns:
+    --------
+    Dict[str, List[dict]]
+        A dictionary mapping the base folder name to its rows.
+    """
+    # event based tables are extracted in a single pass over game plays
+    return {
+        "games": get_game_base(game=game),
+        **get_events_base(game=game, with_situation_time=with_situation_time),
+        "players": get_player_base(game=game),
+    }
+
+
+def get_shift_chart_data_base(shift_chart: dict) -> Dict[str, List[dict]]:
+    """Extract all base tables from a shift chart dictionary.
+
+    Parameters:
+    -----------
+    shift_chart : dict
+        A dictionary containing shift chart data.
+
+    Returns:
+    --------
+    Dict[str, List[dict]]
+        A dictionary mapping the base folder name to its rows.
+    """
+    return {
+        "shifts": get_shift_base(shift_chart=shift_chart),
+    }
@@ -0,0 +1,180 @@
+"""Players' game log responses cache.
+
+A player's game log does not change until the player's next game is played, so the game log
+responses are cached per (player_id, season, season_type) and shared across invocations. The cache
+is stored either in S3 (`s3://bucket/prefix`), or on the local disk.
+"""
+
+import datetime
+import json
+import os
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+import boto3
+from botocore.exceptions import ClientError
+
+GAME_LOG_CACHE_LOCATION = os.environ.get("GAME_LOG_CACHE_LOCATION", "/tmp/cache/game-logs")
+GAME_LOG_CACHE_TTL_SECONDS = int(os.environ.get("GAME_LOG_CACHE_TTL_SECONDS", 6 * 60 * 60))
+
+game_log_cache_stats = Counter()
+
+s3 = boto3.resource("s3")
+
+
+def get_game_log_cache_key(player_id: int, season: str, season_type: str) -> str:
+    """Get the location of a cached game log.
+
+    Parameters:
+    -----------
+    player_id : int
+        The unique identifier for the player.
+    season : str
+        The season in the format 'YYYYYYYY' (e.g., '20202021').
+    season_type : str
+        The type of the season ('2' for regular, '3' for playoffs).
+
+    Returns:
+    --------
+    str
+    """
+    return f"{GAME_LOG_CACHE_LOCATION.rstrip('/')}/{season}/{season_type}/{player_id}.json"
+
+
+def split_s3_location(location: str) -> tuple:
+    """Split an S3 location into bucket name and key.
+
+    Parameters:
+    -----------
+    location : str
+        A string in the format 's3://bucket/key'.
+
+    Returns:
+    --------
+    tuple
+    """
+    bucket_name, _, key = location.removeprefix("s3://").partition("/")
+    return bucket_name, key
+
+
+def read_cached_game_log(
+    player_id: int, season: str, season_type: str, cached_after: Optional[datetime.datetime] = None
+) -> Optional[dict]:
+    """Read a game log response from the cache, if it is not older than the TTL, nor cached before a time.
+
+    Parameters:
+    -----------
+    player_id : int
+        The unique identifier for the player.
+    season : str
+        The season in the format 'YYYYYYYY' (e.g., '20202021').
+    season_type : str
+        The type of the season ('2' for regular, '3' for playoffs).
+    cached_after : datetime.datetime, optional
+        A timezone-aware time, a game log cached before it is a cache miss. Not checked by default.
+
+    Returns:
+    --------
+    dict or None
+        The cached game log response, or None on cache miss.
+    """
+    location = get_game_log_cache_key(player_id=player_id, season=season, season_type=season_type)
+    now = datetime.datetime.now(tz=datetime.timezone.utc)
+    min_cached_at = now - datetime.timedelta(seconds=GAME_LOG_CACHE_TTL_SECONDS)
+    if cached_after is not None:
+        min_cached_at = max(min_cached_at, cached_after)
+    game_log = None
+
+    if location.startswith("s3://"):
+        bucket_name, key = split_s3_location(location=location)
+        try:
+            response = s3.Object(bucket_name=bucket_name, key=key).get()
+            if response["LastModified"] >= min_cached_at:
+                game_log = json.loads(response["Body"].read())
+        except ClientError:
+            pass
+
+    else:
+        path = Path(location)
+        if path.exists() and path.stat().st_mtime >= min_cached_at.timestamp():
+            game_log = json.loads(path.read_bytes())
+
+    game_log_cache_stats["hits" if game_log is not None else "misses"] += 1
+
+    return game_log
+
+
+def write_cached_game_log(player_id: int, season: str, season_type: str, game_log: dict) -> None:
+    """Write a game log response into the cache.
+
+    Parameters:
+    -----------
+    player_id : int
+        The unique identifier for the player.
+    season : str
+        The season in the format 'YYYYYYYY' (e.g., '20202021').
+    season_type : str
+        The type of the season ('2' for regular, '3' for playoffs).
+    game_log : dict
+        The game log response to cache.
+
+    Returns:
+    --------
+    None
+    """
+    location = get_game_log_cache_key(player_id=player_id, season=season, season_type=season_type)
+    body = json.dumps(game_log).encode("utf-8")
+
+    if location.startswith("s3://"):
+        bucket_name, key = split_s3_location(location=location)
+        s3.Object(bucket_name=bucket_name, key=key).put(Body=body)
+
+    else:
+        path = Path(location)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(body)
+
+
+def invalidate_cached_game_log(player_id: int, season: str, season_type: str) -> None:
+    """Remove a game log response from the cache, e.g. when the game log is known to have changed.
+
+    Parameters:
+    -----------
+    player_id : int
+        The unique identifier for the player.
+    season : str
+        The season in the format 'YYYYYYYY' (e.g., '20202021').
+    season_type : str
+        The type of the season ('2' for regular, '3' for playoffs).
+
+    Returns:
+    --------
+    None
+    """
+    location = get_game_log_cache_key(player_id=player_id, season=season, season_type=season_type)
+
+    if location.startswith("s3://"):
+        bucket_name, key = split_s3_location(location=location)
+        s3.Object(bucket_name=bucket_name, key=key).delete()
+
+    else:
+        Path(location).unlink(missing_ok=True)
+
+    game_log_cache_stats["invalidations"] += 1
+
+
+def log_game_log_cache_stats() -> None:
+    """Print game log cache hit/miss counters, and reset them.
+
+    Returns:
+    --------
+    None
+    """
+    if game_log_cache_stats:
+        print(
+            f"ℹ️ Game log cache: {game_log_cache_stats['hits']} hits, "
+            f"{game_log_cache_stats['misses']} misses, "
+            f"{game_log_cache_stats['invalidations']} invalidations"
+        )
+        game_log_cache_stats.clear()
@@ -4,6 +4,8 @@ from typing import List
 
 from utils.general import get_general_event_features, get_general_game_features
 
+HIT_EVENT_TYPES = ("hit",)
+
 
 def get_hit_base(game: dict) -> List[dict]:
     """Extract hits from a game dictionary.
@@ -17,13 +19,32 @@ def get_hit_base(game: dict) -> List[dict]:
     --------
     List[dict]
     """
+    game_features = get_general_game_features(game=game)
+
     return [
-        {
-            **get_general_game_features(game=game),
-            **get_general_event_features(event=event),
-            "hitting_player_id": event.get("details", {}).get("hittingPlayerId"),
-            "hittee_player_id": event.get("details", {}).get("hitteePlayerId"),
-        }
+        get_hit_features(event=event, game_features=game_features)
         for event in game.get("plays")
-        if event.get("typeDescKey") in ("hit")
+        if event.get("typeDescKey") in HIT_EVENT_TYPES
     ]
+
+
+def get_hit_features(event: dict, game_features: dict) -> dict:
+    """Extract hit features from an event dictionary.
+
+    Parameters:
+    -----------
+    event : dict
+        A dictionary containing event information.
+    game_features : dict
+        A dictionary containing general game features, see `get_general_game_features`.
+
+    Returns:
+    --------
+    dict
+    """
+    return {
+        **game_features,
+        **get_general_event_features(event=event),
+        "hitting_player_id": event.get("details", {}).get("hittingPlayerId"),
+        "hittee_player_id": event.get("details", {}).get("hitteePlayerId"),
+    }
@@ -0,0 +1,74 @@
+"""Live game events extraction.
+
+Plays of a game in progress are extracted incrementally, only the plays whose `sortOrder` is newer
+than the last checkpoint are passed to the events extractors.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from common.nhl_client import nhl_api
+from utils.events import EVENT_TYPE_TO_FOLDER_NAME, FOLDER_NAME_TO_FEATURES_FN
+from utils.extract import GAME_DATA_KEYS
+from utils.general import get_general_game_features
+from utils.loader import load_raw_data
+
+URL_GAMECENTER = "https://api-web.nhle.com/v1/gamecenter"
+LIVE_FOLDER_NAMES = ("shots", "penalties", "faceoffs", "hits")
+FINAL_GAME_STATES = ("OFF", "FINAL")
+
+
+def get_live_game(game_id: str) -> Optional[dict]:
+    """Download the current play-by-play of a game.
+
+    Parameters:
+    -----------
+    game_id : str
+        A string representing the unique identifier of the game.
+
+    Returns:
+    --------
+    dict or None
+        A dictionary containing raw game information, or None if the game was NOT loaded.
+    """
+    response = nhl_api.get(url=f"{URL_GAMECENTER}/{game_id}/play-by-play")
+
+    if response is None or not response.ok:
+        print(f"❌ Error: Play-by-play of the game {game_id} was NOT loaded!")
+        return None
+
+    return load_raw_data(body=response.content, keys=(*GAME_DATA_KEYS, "gameState"), name=f"game {game_id}")
+
+
+def get_live_events_base(game: dict, checkpoint: int) -> Tuple[Dict[str, List[dict]], int]:
+    """Extract live event based tables from the plays of a game newer than a checkpoint.
+
+    Parameters:
+    -----------
+    game : dict
+        A dictionary containing raw game information.
+    checkpoint : int
+        The `sortOrder` of the last play extracted before, -1 if no play was extracted yet.
+
+    Returns:
+    --------
+    Tuple[Dict[str, List[dict]], int]
+        A dictionary mapping the base folder name to its new rows, and the new checkpoint.
+    """
+    game_features = get_general_game_features(game=game)
+    folder_name_to_base = {folder_name: [] for folder_name in LIVE_FOLDER_NAMES}
+    new_checkpoint = checkpoint
+
+    for event in game.get("plays", []):
+        sort_order = event.get("sortOrder", -1)
+        if sort_order <= checkpoint:
+            continue
+
+        new_checkpoint = max(new_checkpoint, sort_order)
+
+        folder_name = EVENT_TYPE_TO_FOLDER_NAME.get(event.get("typeDescKey"))
+        if folder_name in folder_name_to_base:
+            folder_name_to_base[folder_name].append(
+                FOLDER_NAME_TO_FEATURES_FN[folder_name](event=event, game_features=game_features)
+            )
+
+    return folder_name_to_base, new_checkpoint
@@ -0,0 +1,43 @@
+"""Raw data loading."""
+
+import json
+import time
+from typing import Iterable, Optional
+
+try:
+    import orjson
+
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
+
+def load_raw_data(body: bytes, keys: Optional[Iterable[str]] = None, name: str = "raw data") -> dict:
+    """Parse raw JSON data directly from bytes, and keep only the needed top-level keys.
+
+    The faster `orjson` parser is used if it is installed, the standard library parser otherwise.
+    The whole document is parsed first, the keys are filtered after parsing. Parse time and peak memory
+    are therefore NOT reduced, only the values of the other top-level keys are released right after parsing.
+
+    Parameters:
+    -----------
+    body : bytes
+        The raw JSON data.
+    keys : Iterable[str], optional
+        Top-level keys to keep after parsing. All keys are kept by default.
+    name : str, optional
+        A name of the raw data used in the log message.
+
+    Returns:
+    --------
+    dict
+    """
+    start = time.perf_counter()
+    data = json_loads(body)
+
+    if keys is not None:
+        data = {key: data[key] for key in keys if key in data}
+
+    print(f"ℹ️ Parsed {name} ({len(body) / 1e6:.2f} MB) in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    return data
@@ -0,0 +1,143 @@
+"""Manifest of transformed raw data.
+
+For every transformed raw file, the manifest records the digest of its content and the versions
+of extractors that produced the base data. A raw file that is uploaded again with the same content
+is not transformed again, unless an extractor of its base data has changed.
+"""
+
+import datetime
+import json
+from typing import Dict
+
+import boto3
+from botocore.exceptions import ClientError
+
+MANIFEST_FOLDER_NAME = "manifests"
+
+# bump the version of a base table whenever its extractor changes, so raw data are transformed again
+RAW_FOLDER_NAME_TO_EXTRACTOR_VERSIONS = {
+    "games": {
+        "games": 1,
+        "shots": 1,
+        "faceoffs": 1,
+        "hits": 1,
+        "possession-changes": 1,
+        "penalties": 1,
+        "players": 1,
+        "situation-time": 1,
+    },
+    "shift-charts": {
+        "shifts": 1,
+    },
+}
+
+s3 = boto3.resource("s3")
+
+
+def get_extractor_versions(key: str) -> Dict[str, int]:
+    """Get the versions of extractors that produce base data from a raw file.
+
+    Parameters:
+    -----------
+    key : str
+        A string that contains the key of the raw file, e.g. `games/2023/regular/2023020001.json`.
+
+    Returns:
+    --------
+    Dict[str, int]
+        A dictionary mapping the base folder name to the extractor version.
+    """
+    return RAW_FOLDER_NAME_TO_EXTRACTOR_VERSIONS.get(key.split("/")[0], {})
+
+
+def get_manifest_entry(bucket_name: str, key: str) -> dict:
+    """Read the manifest entry of a raw file.
+
+    Parameters:
+    -----------
+    bucket_name : str
+        A string that contains the name of the bucket with the manifest.
+    key : str
+        A string that contains the key of the raw file.
+
+    Returns:
+    --------
+    dict
+        The manifest entry, or an empty dictionary if the raw file was not transformed yet.
+    """
+    try:
+        body = s3.Object(bucket_name=bucket_name, key=f"{MANIFEST_FOLDER_NAME}/{key}").get()["Body"].read()
+        return json.loads(body)
+    except ClientError:
+        return {}
+
+
+def is_transformed(bucket_name: str, key: str, raw_digest: str) -> bool:
+    """Check if a raw file with the same content was already transformed by the current extractors.
+
+    Parameters:
+    -----------
+    bucket_name : str
+        A string that contains the name of the bucket with the manifest.
+    key : str
+        A string that contains the key of the raw file.
+    raw_digest : str
+        A digest of the raw file content.
+
+    Returns:
+    --------
+    bool
+    """
+    manifest_entry = get_manifest_entry(bucket_name=bucket_name, key=key)
+
+    return (
+        manifest_entry.get("raw_digest") == raw_digest
+        and manifest_entry.get("extractor_versions") == get_extractor_versions(key=key)
+    )
+
+
+def is_changed(bucket_name: str, key: str, raw_digest: str) -> bool:
+    """Check if a raw file was transformed before with a different content, e.g. corrected game data.
+
+    Parameters:
+    -----------
+    bucket_name : str
+        A string that contains the name of the bucket with the manifest.
+    key : str
+        A string that contains the key of the raw file.
+    raw_digest : str
+        A digest of the raw file content.
+
+    Returns:
+    --------
+    bool
+    """
+    manifest_entry = get_manifest_entry(bucket_name=bucket_name, key=key)
+
+    return manifest_entry.get("raw_digest") not in (None, raw_digest)
+
+
+def save_manifest_entry(bucket_name: str, key: str, raw_digest: str) -> None:
+    """Record a raw file as transformed by the current extractors.
+
+    Parameters:
+    -----------
+    bucket_name : str
+        A string that contains the name of the bucket with the manifest.
+    key : str
+        A string that contains the key of the raw file.
+    raw_digest : str
+        A digest of the raw file content.
+
+    Returns:
+    --------
+    None
+    """
+    manifest_entry = {
+        "raw_digest": raw_digest,
+        "extractor_versions": get_extractor_versions(key=key),
+        "transformed_at": datetime.datetime.now(tz=datetime.timezone.utc).isoformat(),
+    }
+    s3.Object(bucket_name=bucket_name, key=f"{MANIFEST_FOLDER_NAME}/{key}").put(
+        Body=json.dumps(manifest_entry).encode("utf-8")
+    )
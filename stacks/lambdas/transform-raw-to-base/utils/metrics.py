@@ -0,0 +1,89 @@
+"""Metrics reporting."""
+
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+METRICS_NAMESPACE = "FrozenFactsCenter"
+
+import_duration_ms: Dict[str, float] = {}
+
+
+@contextmanager
+def timed_import(name: str) -> Iterator[None]:
+    """Measure the duration of the import in the context, and record it under the dependency name.
+
+    The import itself is timed, and nothing is recorded if the dependency module was already imported.
+    Threads importing the same dependency at once wait for each other, so the longest duration is kept.
+
+    Parameters:
+    -----------
+    name : str
+        A module name of the imported dependency, e.g. `pyarrow`.
+
+    Returns:
+    --------
+    Iterator[None]
+    """
+    if name in sys.modules:
+        yield
+        return
+
+    start = time.perf_counter()
+    yield
+    import_duration_ms[name] = max(import_duration_ms.get(name, 0), (time.perf_counter() - start) * 1000)
+
+
+def emit_metric(name: str, value: float, unit: str = "Milliseconds", **dimensions: str) -> None:
+    """Print a metric in the CloudWatch embedded metric format, so it is collected from the logs.
+
+    Parameters:
+    -----------
+    name : str
+        A name of the metric.
+    value : float
+        A value of the metric.
+    unit : str, optional
+        A CloudWatch unit of the metric. Defaults to "Milliseconds".
+    **dimensions : str
+        Dimensions of the metric, the function name is always added.
+
+    Returns:
+    --------
+    None
+    """
+    dimensions = {"FunctionName": os.environ.get("AWS_LAMBDA_FUNCTION_NAME", "local"), **dimensions}
+    print(
+        json.dumps(
+            {
+                "_aws": {
+                    "Timestamp": int(time.time() * 1000),
+                    "CloudWatchMetrics": [
+                        {
+                            "Namespace": METRICS_NAMESPACE,
+                            "Dimensions": [list(dimensions)],
+                            "Metrics": [{"Name": name, "Unit": unit}],
+                        }
+                    ],
+                },
+                **dimensions,
+                name: round(value, 3),
+            }
+        )
+    )
+
+
+def emit_import_duration_metrics() -> None:
+    """Emit the durations of imports recorded since the last call, one metric per dependency.
+
+    Returns:
+    --------
+    None
+    """
+    for name, duration_ms in import_duration_ms.items():
+        emit_metric(name="ImportDuration", value=duration_ms, Dependency=name)
+
+    import_duration_ms.clear()
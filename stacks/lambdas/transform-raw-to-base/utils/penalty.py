@@ -4,6 +4,8 @@ from typing import List
 
 from utils.general import get_general_event_features, get_general_game_features
 
+PENALTY_EVENT_TYPES = ("penalty",)
+
 
 def get_penalty_base(game: dict) -> List[dict]:
     """Extract penalties from a game dictionary.
@@ -17,17 +19,36 @@ def get_penalty_base(game: dict) -> List[dict]:
     --------
     List[dict]
     """
+    game_features = get_general_game_features(game=game)
+
     return [
-        {
-            **get_general_game_features(game=game),
-            **get_general_event_features(event=event),
-            "penalty_code": event.get("details", {}).get("typeCode"),
-            "penalty_type": event.get("details", {}).get("descKey"),
-            "duration": event.get("details", {}).get("duration"),
-            "committed_by_player_id": event.get("details", {}).get("committedByPlayerId"),
-            "drawn_by_player_id": event.get("details", {}).get("drawnByPlayerId"),
-            "served_by_player_id": event.get("details", {}).get("servedByPlayerId"),
-        }
+        get_penalty_features(event=event, game_features=game_features)
         for event in game.get("plays")
-        if event.get("typeDescKey") in ("penalty")
+        if event.get("typeDescKey") in PENALTY_EVENT_TYPES
     ]
+
+
+def get_penalty_features(event: dict, game_features: dict) -> dict:
+    """Extract penalty features from an event dictionary.
+
+    Parameters:
+    -----------
+    event : dict
+        A dictionary containing event information.
+    game_features : dict
+        A dictionary containing general game features, see `get_general_game_features`.
+
+    Returns:
+    --------
+    dict
+    """
+    return {
+        **game_features,
+        **get_general_event_features(event=event),
+        "penalty_code": event.get("details", {}).get("typeCode"),
+        "penalty_type": event.get("details", {}).get("descKey"),
+        "duration": event.get("details", {}).get("duration"),
+        "committed_by_player_id": event.get("details", {}).get("committedByPlayerId"),
+        "drawn_by_player_id": event.get("details", {}).get("drawnByPlayerId"),
+        "served_by_player_id": event.get("details", {}).get("servedByPlayerId"),
+    }
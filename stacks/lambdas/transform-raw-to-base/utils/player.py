@@ -1,14 +1,30 @@
 """Player features extraction."""
 
-from typing import List
+import datetime
+import itertools
+from collections import Counter
+from typing import Dict, List, Optional
 
-import requests
+from common.nhl_client import nhl_api
+from utils.game_log_cache import (
+    invalidate_cached_game_log,
+    log_game_log_cache_stats,
+    read_cached_game_log,
+    write_cached_game_log,
+)
 from utils.general import get_general_game_features
 
+URL_GAMECENTER = "https://api-web.nhle.com/v1/gamecenter"
+URL_PLAYER = "https://api-web.nhle.com/v1/player"
+
 
 def get_player_base(game: dict) -> List[dict]:
     """Extract players from a game dictionary.
 
+    Players' game stats are taken from the game boxscore, downloaded once per game, and joined to
+    the roster spots in memory. If the boxscore is not available, the stats fall back to the players'
+    game logs, downloaded once per player.
+
     Parameters:
     -----------
     game : dict
@@ -20,10 +36,12 @@ def get_player_base(game: dict) -> List[dict]:
     """
     game_id = game.get("id")
     season_start_year = int(game_id / 1e6)
+    game_features = get_general_game_features(game=game)
+    player_id_to_stats = get_boxscore_player_id_to_stats(game=game)
 
-    return [
+    players = [
         {
-            **get_general_game_features(game=game),
+            **game_features,
             "player_id": player.get("playerId"),
             "team_id": player.get("teamId"),
             "season": game.get("season"),
@@ -32,21 +50,183 @@ def get_player_base(game: dict) -> List[dict]:
             "sweater_number": player.get("sweaterNumber"),
             "position_code": player.get("positionCode"),
             "headshot": player.get("headshot"),
-            **get_game_log_features(
-                player_id=player.get("playerId"),
-                game_id=game.get("id"),
-                season=f"{season_start_year}{season_start_year + 1}",
-                season_type=str(game_id)[5],
+            **(
+                player_id_to_stats.get(player.get("playerId"), get_stats_features(stats={}))
+                if player_id_to_stats is not None
+                else get_game_log_features(
+                    player_id=player.get("playerId"),
+                    game_id=game.get("id"),
+                    season=f"{season_start_year}{season_start_year + 1}",
+                    season_type=str(game_id)[5],
+                    game_start_time_utc=game.get("startTimeUTC"),
+                )
             ),
         }
         for player in game.get("rosterSpots")
     ]
+    log_game_log_cache_stats()
+
+    return players
+
+
+def invalidate_cached_game_logs(game: dict) -> None:
+    """Remove cached game logs of all players of a game, e.g. when the game's stats were corrected.
+
+    Parameters:
+    -----------
+    game : dict
+        A dictionary containing game information.
+
+    Returns:
+    --------
+    None
+    """
+    game_id = game.get("id")
+    season_start_year = int(game_id / 1e6)
+
+    for player in game.get("rosterSpots", []):
+        invalidate_cached_game_log(
+            player_id=player.get("playerId"),
+            season=f"{season_start_year}{season_start_year + 1}",
+            season_type=str(game_id)[5],
+        )
 
 
-def get_game_log_features(player_id: int, game_id: int, season: str, season_type: str) -> dict:
+def get_boxscore_player_id_to_stats(game: dict) -> Optional[Dict[int, dict]]:
+    """Fetch the game boxscore and extract stats features of every skater and goalie in the game.
+
+    Stats missing in the boxscore (goalies' scoring, game-winning, overtime, and shorthanded goals,
+    power play and shorthanded points, and shutouts) are derived from the game plays.
+
+    Parameters:
+    -----------
+    game : dict
+        A dictionary containing game information.
+
+    Returns:
+    --------
+    Dict[int, dict] or None
+        A dictionary mapping player ID to its stats features, or None if the boxscore was NOT loaded.
+    """
+    response = nhl_api.get(url=f"{URL_GAMECENTER}/{game.get('id')}/boxscore")
+
+    if response is None or not response.ok:
+        print(f"❌ Error: Boxscore for the game {game.get('id')} was NOT loaded!")
+        return None
+
+    player_id_to_scoring = get_player_id_to_scoring(game=game)
+    player_id_to_stats = {}
+
+    for team_stats in response.json().get("playerByGameStats", {}).values():
+        goalies = team_stats.get("goalies", [])
+        goalies_played_cnt = sum(goalie.get("toi", "00:00") != "00:00" for goalie in goalies)
+
+        for player in itertools.chain(team_stats.get("forwards", []), team_stats.get("defense", []), goalies):
+            scoring = player_id_to_scoring.get(player.get("playerId"), Counter())
+            is_goalie = player.get("position") == "G"
+            is_shutout = is_goalie and goalies_played_cnt == 1 and player.get("goalsAgainst") == 0
+
+            player_id_to_stats[player.get("playerId")] = get_stats_features(
+                stats={
+                    "goals": scoring["goals"],
+                    "assists": scoring["assists"],
+                    "points": scoring["goals"] + scoring["assists"],
+                    **player,
+                    "shots": player.get("sog"),
+                    "savePctg": float(player["savePctg"]) if player.get("savePctg") is not None else None,
+                    "gamesStarted": int(bool(player.get("starter"))) if is_goalie else None,
+                    "shutouts": int(is_shutout) if is_goalie else None,
+                    "powerPlayPoints": None if is_goalie else scoring["power_play_points"],
+                    "gameWinningGoals": None if is_goalie else scoring["game_winning_goals"],
+                    "otGoals": None if is_goalie else scoring["ot_goals"],
+                    "shorthandedGoals": None if is_goalie else scoring["shorthanded_goals"],
+                    "shorthandedPoints": None if is_goalie else scoring["shorthanded_points"],
+                }
+            )
+
+    return player_id_to_stats
+
+
+def get_player_id_to_scoring(game: dict) -> Dict[int, Counter]:
+    """Count goals and assists of each player by game situation from goals in the game plays.
+
+    A goal is scored on a power play (short-handed) if the scoring team has more (fewer) skaters
+    on ice than the opponent, not counting an extra attacker for a pulled goalie. Shootout goals
+    are skipped, and no game-winning goal is credited in games decided by a shootout.
+
+    Parameters:
+    -----------
+    game : dict
+        A dictionary containing game information.
+
+    Returns:
+    --------
+    Dict[int, Counter]
+    """
+    home_team_id = game.get("homeTeam", {}).get("id")
+    goals = [
+        event
+        for event in game.get("plays", [])
+        if event.get("typeDescKey") == "goal" and event.get("periodDescriptor", {}).get("periodType") != "SO"
+    ]
+
+    team_id_to_goals_cnt = Counter(goal.get("details", {}).get("eventOwnerTeamId") for goal in goals)
+    (winning_team_id, winning_goals_cnt), *rest = team_id_to_goals_cnt.most_common() or [(None, 0)]
+    losing_goals_cnt = rest[0][1] if rest else 0
+    if winning_goals_cnt == losing_goals_cnt:
+        winning_team_id = None
+
+    player_id_to_scoring = {}
+    team_id_to_goal_i = Counter()
+
+    for goal in goals:
+        details = goal.get("details", {})
+        team_id = details.get("eventOwnerTeamId")
+        team_id_to_goal_i[team_id] += 1
+
+        # situation code digits: away goalie, away skaters, home skaters, home goalie
+        situation_code = goal.get("situationCode") or "1551"
+        away_skaters = int(situation_code[1]) - (situation_code[0] == "0")
+        home_skaters = int(situation_code[2]) - (situation_code[3] == "0")
+        own_skaters, opponent_skaters = (
+            (home_skaters, away_skaters) if team_id == home_team_id else (away_skaters, home_skaters)
+        )
+        is_power_play = own_skaters > opponent_skaters
+        is_shorthanded = own_skaters < opponent_skaters
+
+        for player_id, is_goal in [
+            (details.get("scoringPlayerId"), True),
+            (details.get("assist1PlayerId"), False),
+            (details.get("assist2PlayerId"), False),
+        ]:
+            if player_id is None:
+                continue
+
+            scoring = player_id_to_scoring.setdefault(player_id, Counter())
+            scoring["goals" if is_goal else "assists"] += 1
+            scoring["power_play_points"] += is_power_play
+            scoring["shorthanded_points"] += is_shorthanded
+
+            if is_goal:
+                scoring["shorthanded_goals"] += is_shorthanded
+                scoring["ot_goals"] += goal.get("periodDescriptor", {}).get("periodType") == "OT"
+                scoring["game_winning_goals"] += (
+                    team_id == winning_team_id and team_id_to_goal_i[team_id] == losing_goals_cnt + 1
+                )
+
+    return player_id_to_scoring
+
+
+def get_game_log_features(
+    player_id: int, game_id: int, season: str, season_type: str, game_start_time_utc: Optional[str] = None
+) -> dict:
     """
     Fetch and extract game log features for a specified player and game.
 
+    Game log responses are read from the game log cache, and downloaded only on cache miss. A game log
+    cached before the game started cannot contain the game, so it is a cache miss. A game log cached
+    later is used even if it lacks the game, e.g. for a player who dressed but did not play.
+
     Parameters
     ----------
     player_id : int
@@ -57,41 +237,70 @@ def get_game_log_features(player_id: int, game_id: int, season: str, season_type
         The season in the format 'YYYYYYYY' (e.g., '20202021').
     season_type : str
         The type of the season ('2' for regular, '3' for playoffs).
+    game_start_time_utc : str, optional
+        The start time of the game in ISO 8601 format (e.g., '2023-10-10T23:00:00Z'). If it is not
+        given, the cached game logs are used up to their TTL.
 
     Returns
     -------
     dict
     """
-    response = requests.get(url=f"https://api-web.nhle.com/v1/player/{player_id}/game-log/{season}/{season_type}")
+    cache_key = {"player_id": player_id, "season": season, "season_type": season_type}
+    game_log_response = read_cached_game_log(
+        **cache_key,
+        cached_after=(
+            datetime.datetime.fromisoformat(game_start_time_utc.replace("Z", "+00:00"))
+            if game_start_time_utc
+            else None
+        ),
+    )
 
-    game_log = {}
+    if game_log_response is None:
+        game_log_response = nhl_api.get_json(url=f"{URL_PLAYER}/{player_id}/game-log/{season}/{season_type}")
+
+        if game_log_response is not None:
+            write_cached_game_log(**cache_key, game_log=game_log_response)
+
+    game_log = next(
+        (item for item in (game_log_response or {}).get("gameLog", []) if item["gameId"] == game_id),
+        {},
+    )
+
+    return get_stats_features(stats=game_log)
 
-    if response.ok:
-        game_log = next(
-            (item for item in response.json().get("gameLog", {}) if item["gameId"] == game_id),
-            {},
-        )
 
+def get_stats_features(stats: dict) -> dict:
+    """Extract stats features from a player's game log, or boxscore dictionary.
+
+    Parameters:
+    -----------
+    stats : dict
+        A dictionary containing a player's stats in a game.
+
+    Returns:
+    --------
+    dict
+    """
     return {
-        "goals": game_log.get("goals"),
-        "assists": game_log.get("assists"),
-        "points": game_log.get("points"),
-        "pim": game_log.get("pim"),
-        "toi": game_log.get("toi"),
+        "goals": stats.get("goals"),
+        "assists": stats.get("assists"),
+        "points": stats.get("points"),
+        "pim": stats.get("pim"),
+        "toi": stats.get("toi"),
         # goaltender stats
-        "games_started": game_log.get("gamesStarted"),
-        "shots_against": game_log.get("shotsAgainst"),
-        "goals_against": game_log.get("goalsAgainst"),
-        "save_pctg": game_log.get("savePctg"),
-        "shutouts": game_log.get("shutouts"),
+        "games_started": stats.get("gamesStarted"),
+        "shots_against": stats.get("shotsAgainst"),
+        "goals_against": stats.get("goalsAgainst"),
+        "save_pctg": stats.get("savePctg"),
+        "shutouts": stats.get("shutouts"),
         # skater stats
-        "plus_minus": game_log.get("plusMinus"),
-        "power_play_goals": game_log.get("powerPlayGoals"),
-        "power_play_points": game_log.get("powerPlayPoints"),
-        "game_winning_goals": game_log.get("gameWinningGoals"),
-        "ot_goals": game_log.get("otGoals"),
-        "shots": game_log.get("shots"),
-        "shifts": game_log.get("shifts"),
-        "shorthanded_goals": game_log.get("shorthandedGoals"),
-        "shorthanded_points": game_log.get("shorthandedPoints"),
+        "plus_minus": stats.get("plusMinus"),
+        "power_play_goals": stats.get("powerPlayGoals"),
+        "power_play_points": stats.get("powerPlayPoints"),
+        "game_winning_goals": stats.get("gameWinningGoals"),
+        "ot_goals": stats.get("otGoals"),
+        "shots": stats.get("shots"),
+        "shifts": stats.get("shifts"),
+        "shorthanded_goals": stats.get("shorthandedGoals"),
+        "shorthanded_points": stats.get("shorthandedPoints"),
     }
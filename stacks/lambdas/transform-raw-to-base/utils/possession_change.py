@@ -4,6 +4,8 @@ from typing import List
 
 from utils.general import get_general_event_features, get_general_game_features
 
+POSSESSION_CHANGE_EVENT_TYPES = ("takeaway", "giveaway")
+
 
 def get_possession_change_base(game: dict) -> List[dict]:
     """Extract takeaways and giveaways from a game dictionary.
@@ -17,12 +19,31 @@ def get_possession_change_base(game: dict) -> List[dict]:
     --------
     List[dict]
     """
+    game_features = get_general_game_features(game=game)
+
     return [
-        {
-            **get_general_game_features(game=game),
-            **get_general_event_features(event=event),
-            "player_id": event.get("details", {}).get("playerId"),
-        }
+        get_possession_change_features(event=event, game_features=game_features)
         for event in game.get("plays")
-        if event.get("typeDescKey") in ("takeaway", "giveaway")
+        if event.get("typeDescKey") in POSSESSION_CHANGE_EVENT_TYPES
     ]
+
+
+def get_possession_change_features(event: dict, game_features: dict) -> dict:
+    """Extract takeaway or giveaway features from an event dictionary.
+
+    Parameters:
+    -----------
+    event : dict
+        A dictionary containing event information.
+    game_features : dict
+        A dictionary containing general game features, see `get_general_game_features`.
+
+    Returns:
+    --------
+    dict
+    """
+    return {
+        **game_features,
+        **get_general_event_features(event=event),
+        "player_id": event.get("details", {}).get("playerId"),
+    }
@@ -0,0 +1,172 @@
+"""Arrow schemas of base tables.
+
+Every base table is written with its explicit schema, so the PARQUET files of all games have
+the same column types, even if a column is empty in some games.
+"""
+
+from typing import List
+
+import pyarrow as pa
+
+GENERAL_GAME_FIELDS = [
+    ("game_id", pa.int64()),
+    ("game_date", pa.string()),
+    ("away_team_id", pa.int64()),
+    ("home_team_id", pa.int64()),
+]
+
+GENERAL_EVENT_FIELDS = [
+    ("id", pa.int64()),
+    ("period", pa.int64()),
+    ("period_type", pa.string()),
+    ("time_in_period", pa.string()),
+    ("time_remaining", pa.string()),
+    ("situation_code", pa.string()),
+    ("home_team_defending_side", pa.string()),
+    ("event_type", pa.string()),
+    ("sort_order", pa.int64()),
+    ("x_coord", pa.int64()),
+    ("y_coord", pa.int64()),
+    ("zone_code", pa.string()),
+    ("event_owner_team_id", pa.int64()),
+]
+
+FOLDER_NAME_TO_SCHEMA = {
+    "games": pa.schema(
+        [
+            ("id", pa.int64()),
+            ("season", pa.int64()),
+            ("type", pa.int64()),
+            ("date", pa.string()),
+            ("start_time_utc", pa.string()),
+            ("venue", pa.string()),
+            ("period", pa.int64()),
+            ("period_type", pa.string()),
+            ("away_team_id", pa.int64()),
+            ("away_team_abbrev", pa.string()),
+            ("away_team_score", pa.int64()),
+            ("home_team_id", pa.int64()),
+            ("home_team_abbrev", pa.string()),
+            ("home_team_score", pa.int64()),
+        ]
+    ),
+    "shots": pa.schema(
+        [
+            *GENERAL_GAME_FIELDS,
+            *GENERAL_EVENT_FIELDS,
+            ("shot_type", pa.string()),
+            ("shooting_player_id", pa.int64()),
+            ("goalie_in_net_id", pa.int64()),
+            ("assist_1_player_id", pa.int64()),
+            ("assist_2_player_id", pa.int64()),
+            ("blocking_player_id", pa.int64()),
+            ("missed_shot_reason", pa.string()),
+        ]
+    ),
+    "faceoffs": pa.schema(
+        [
+            *GENERAL_GAME_FIELDS,
+            *GENERAL_EVENT_FIELDS,
+            ("winning_player_id", pa.int64()),
+            ("losing_player_id", pa.int64()),
+        ]
+    ),
+    "hits": pa.schema(
+        [
+            *GENERAL_GAME_FIELDS,
+            *GENERAL_EVENT_FIELDS,
+            ("hitting_player_id", pa.int64()),
+            ("hittee_player_id", pa.int64()),
+        ]
+    ),
+    "possession-changes": pa.schema(
+        [
+            *GENERAL_GAME_FIELDS,
+            *GENERAL_EVENT_FIELDS,
+            ("player_id", pa.int64()),
+        ]
+    ),
+    "penalties": pa.schema(
+        [
+            *GENERAL_GAME_FIELDS,
+            *GENERAL_EVENT_FIELDS,
+            ("penalty_code", pa.string()),
+            ("penalty_type", pa.string()),
+            ("duration", pa.int64()),
+            ("committed_by_player_id", pa.int64()),
+            ("drawn_by_player_id", pa.int64()),
+            ("served_by_player_id", pa.int64()),
+        ]
+    ),
+    "players": pa.schema(
+        [
+            *GENERAL_GAME_FIELDS,
+            ("player_id", pa.int64()),
+            ("team_id", pa.int64()),
+            ("season", pa.int64()),
+            ("first_name", pa.string()),
+            ("last_name", pa.string()),
+            ("sweater_number", pa.int64()),
+            ("position_code", pa.string()),
+            ("headshot", pa.string()),
+            ("goals", pa.int64()),
+            ("assists", pa.int64()),
+            ("points", pa.int64()),
+            ("pim", pa.int64()),
+            ("toi", pa.string()),
+            ("games_started", pa.int64()),
+            ("shots_against", pa.int64()),
+            ("goals_against", pa.int64()),
+            ("save_pctg", pa.float64()),
+            ("shutouts", pa.int64()),
+            ("plus_minus", pa.int64()),
+            ("power_play_goals", pa.int64()),
+            ("power_play_points", pa.int64()),
+            ("game_winning_goals", pa.int64()),
+            ("ot_goals", pa.int64()),
+            ("shots", pa.int64()),
+            ("shifts", pa.int64()),
+            ("shorthanded_goals", pa.int64()),
+            ("shorthanded_points", pa.int64()),
+        ]
+    ),
+    "situation-time": pa.schema(
+        [
+            *GENERAL_GAME_FIELDS,
+            ("situation_team_id", pa.int64()),
+            ("situation_code", pa.string()),
+            ("situation_type", pa.string()),
+            ("situation_time", pa.float64()),
+        ]
+    ),
+    "shifts": pa.schema(
+        [
+            ("game_id", pa.int64()),
+            ("shift_id", pa.int64()),
+            ("player_id", pa.int64()),
+            ("team_id", pa.int64()),
+            ("period", pa.int64()),
+            ("start_time", pa.string()),
+            ("end_time", pa.string()),
+            ("duration", pa.string()),
+            ("shift_number", pa.int64()),
+        ]
+    ),
+}
+
+
+def get_base_table(base: List[dict], folder_name: str) -> pa.Table:
+    """Convert base data into an Arrow table with the explicit schema of the base table.
+
+    Parameters:
+    -----------
+    base : List[dict]
+        A list of dictionaries that contains the base data.
+    folder_name : str
+        A string that contains the name of the base table folder.
+
+    Returns:
+    --------
+    pa.Table
+    """
+    return pa.Table.from_pylist(mapping=base, schema=FOLDER_NAME_TO_SCHEMA[folder_name])
@@ -4,6 +4,8 @@ from typing import List
 
 from utils.general import get_general_event_features, get_general_game_features
 
+SHOT_EVENT_TYPES = ("goal", "shot-on-goal", "blocked-shot", "missed-shot")
+
 
 def get_shot_base(game: dict) -> List[dict]:
     """Extract shots and goals from a game dictionary.
@@ -17,22 +19,41 @@ def get_shot_base(game: dict) -> List[dict]:
     --------
     List[dict]
     """
+    game_features = get_general_game_features(game=game)
+
     return [
-        {
-            **get_general_game_features(game=game),
-            **get_general_event_features(event=event),
-            "shot_type": event.get("details", {}).get("shotType"),
-            "shooting_player_id": (
-                event.get("details", {}).get("scoringPlayerId")
-                if event.get("typeDescKey") == "goal"
-                else event.get("details", {}).get("shootingPlayerId")
-            ),
-            "goalie_in_net_id": event.get("details", {}).get("goalieInNetId"),
-            "assist_1_player_id": event.get("details", {}).get("assist1PlayerId"),
-            "assist_2_player_id": event.get("details", {}).get("assist2PlayerId"),
-            "blocking_player_id": event.get("details", {}).get("blockingPlayerId"),
-            "missed_shot_reason": event.get("details", {}).get("reason"),
-        }
+        get_shot_features(event=event, game_features=game_features)
         for event in game.get("plays")
-        if event.get("typeDescKey") in ("goal", "shot-on-goal", "blocked-shot", "missed-shot")
+        if event.get("typeDescKey") in SHOT_EVENT_TYPES
     ]
+
+
+def get_shot_features(event: dict, game_features: dict) -> dict:
+    """Extract shot or goal features from an event dictionary.
+
+    Parameters:
+    -----------
+    event : dict
+        A dictionary containing event information.
+    game_features : dict
+        A dictionary containing general game features, see `get_general_game_features`.
+
+    Returns:
+    --------
+    dict
+    """
+    return {
+        **game_features,
+        **get_general_event_features(event=event),
+        "shot_type": event.get("details", {}).get("shotType"),
+        "shooting_player_id": (
+            event.get("details", {}).get("scoringPlayerId")
+            if event.get("typeDescKey") == "goal"
+            else event.get("details", {}).get("shootingPlayerId")
+        ),
+        "goalie_in_net_id": event.get("details", {}).get("goalieInNetId"),
+        "assist_1_player_id": event.get("details", {}).get("assist1PlayerId"),
+        "assist_2_player_id": event.get("details", {}).get("assist2PlayerId"),
+        "blocking_player_id": event.get("details", {}).get("blockingPlayerId"),
+        "missed_shot_reason": event.get("details", {}).get("reason"),
+    }
@@ -1,7 +1,7 @@
 from enum import Enum
-from typing import List
+from typing import Dict, List, Tuple
 
-import pandas as pd
+import numpy as np
 from utils.general import get_general_game_features
 
 
@@ -44,13 +44,111 @@ def get_situation_time_base(game: dict) -> List[dict]:
     --------
     List[dict]
     """
-    home_team_id = game.get("homeTeam", {}).get("id")
-    away_team_id = game.get("awayTeam", {}).get("id")
-    situation_code_to_time = get_situation_code_to_time(game=game)
+    return get_situation_time_features(
+        game_features=get_general_game_features(game=game),
+        situations=[get_situation(event=event) for event in game.get("plays", [])],
+    )
+
+
+def get_season_situation_time_base(games: List[dict]) -> List[dict]:
+    """Extract situation time from multiple game dictionaries, e.g. a whole season, at once.
+
+    Situation time of all games is computed in a single vectorized call.
+
+    Parameters:
+    -----------
+    games : List[dict]
+        A list of dictionaries containing game information.
+
+    Returns:
+    --------
+    List[dict]
+    """
+    situations = [
+        (game.get("id"), *get_situation(event=event)) for game in games for event in game.get("plays", [])
+    ]
+    game_ids, periods, seconds, situation_codes = zip(*situations) if situations else ([], [], [], [])
+    game_id_to_situation_code_to_time = get_game_id_to_situation_code_to_time(
+        game_ids=np.asarray(game_ids),
+        periods=np.asarray(periods, dtype=np.int64),
+        seconds=np.asarray(seconds, dtype=np.int64),
+        situation_codes=np.asarray(situation_codes, dtype=object),
+    )
 
+    return [
+        row
+        for game in games
+        for row in get_situation_time_rows(
+            game_features=get_general_game_features(game=game),
+            situation_code_to_time=game_id_to_situation_code_to_time.get(game.get("id"), {}),
+        )
+    ]
+
+
+def get_situation(event: dict) -> Tuple[int, int, str]:
+    """Extract the period, seconds elapsed in period and situation code from an event dictionary.
+
+    Parameters:
+    -----------
+    event : dict
+        A dictionary containing event information.
+
+    Returns:
+    --------
+    Tuple[int, int, str]
+    """
+    minutes, seconds = event.get("timeInPeriod").split(":")
+
+    return (
+        event.get("periodDescriptor", {}).get("number"),
+        int(minutes) * 60 + int(seconds),
+        event.get("situationCode"),
+    )
+
+
+def get_situation_time_features(game_features: dict, situations: List[Tuple[int, int, str]]) -> List[dict]:
+    """Compute situation time rows for both teams of a game.
+
+    Parameters:
+    -----------
+    game_features : dict
+        A dictionary containing general game features, see `get_general_game_features`.
+    situations : List[Tuple[int, int, str]]
+        A list of (period, seconds in period, situation code) tuples, one per event, see `get_situation`.
+
+    Returns:
+    --------
+    List[dict]
+    """
+    periods, seconds, situation_codes = zip(*situations) if situations else ([], [], [])
+
+    return get_situation_time_rows(
+        game_features=game_features,
+        situation_code_to_time=get_situation_code_to_time(
+            periods=np.asarray(periods, dtype=np.int64),
+            seconds=np.asarray(seconds, dtype=np.int64),
+            situation_codes=np.asarray(situation_codes, dtype=object),
+        ),
+    )
+
+
+def get_situation_time_rows(game_features: dict, situation_code_to_time: dict) -> List[dict]:
+    """Create situation time rows for both teams of a game.
+
+    Parameters:
+    -----------
+    game_features : dict
+        A dictionary containing general game features, see `get_general_game_features`.
+    situation_code_to_time : dict
+        A dictionary mapping situation code to the total time spent in it.
+
+    Returns:
+    --------
+    List[dict]
+    """
     return [
         {
-            **get_general_game_features(game=game),
+            **game_features,
             "situation_team_id": team_id,
             "situation_code": situation_code,
             "situation_type": SituationType.from_situation_code_and_team_type(
@@ -60,62 +158,113 @@ def get_situation_time_base(game: dict) -> List[dict]:
             "situation_time": time,
         }
         for team_id, team_type in [
-            (home_team_id, TeamType.HOME),
-            (away_team_id, TeamType.AWAY),
+            (game_features.get("home_team_id"), TeamType.HOME),
+            (game_features.get("away_team_id"), TeamType.AWAY),
         ]
         for situation_code, time in situation_code_to_time.items()
     ]
 
 
-def get_situation_code_to_time(game: dict) -> dict:
+def get_situation_code_to_time(periods: np.ndarray, seconds: np.ndarray, situation_codes: np.ndarray) -> dict:
     """Compute the total time spent in each game situation.
 
     Parameters:
     -----------
-    game : dict
-        A dictionary containing game data, including plays with timestamps and situation codes.
+    periods : np.ndarray
+        An array with the period of each event.
+    seconds : np.ndarray
+        An array with the seconds elapsed in period of each event.
+    situation_codes : np.ndarray
+        An array with the situation code of each event.
 
     Returns:
     --------
     dict
     """
-    return (
-        pd.DataFrame(
-            {
-                "game_id": game.get("id"),
-                "type": play.get("typeDescKey"),
-                "period": play.get("periodDescriptor", {}).get("number"),
-                "time_in_period": play.get("timeInPeriod"),
-                "situation_code": play.get("situationCode"),
-            }
-            for play in game.get("plays", [])
-        )
-        # compute time in game and categorize situations
-        .assign(
-            minutes_in_period=lambda _df: _df.time_in_period.str.split(":").str[0].astype(int),
-            seconds_in_period=lambda _df: _df.time_in_period.str.split(":").str[1].astype(int),
-            time_in_game=lambda _df: 60 * 20 * (_df.period - 1) + _df.minutes_in_period * 60 + _df.seconds_in_period,
-            is_previous_situation_different=lambda _df: _df.situation_code.ne(_df.situation_code.shift()),
-            situation_order_id=lambda _df: _df.is_previous_situation_different.cumsum(),
-        )
-        # determine the start and end time of each situation
-        .groupby(["situation_order_id", "situation_code"])
-        .agg(
-            situation_start=("time_in_game", "min"),
-            situation_end=("time_in_game", "max"),
-        )
-        # adjust for gaps in time between situations
-        .assign(
-            situation_start_correction=lambda _df: (_df.situation_start - _df.situation_end.shift()) / 2,
-            situation_end_correction=lambda _df: (_df.situation_start.shift(-1) - _df.situation_end) / 2,
-            situation_start=lambda _df: _df.situation_start - _df.situation_start_correction.fillna(0),
-            situation_end=lambda _df: _df.situation_end + _df.situation_end_correction.fillna(0),
-            time_on_ice=lambda _df: _df.situation_end - _df.situation_start,
-        )
-        # aggregate total time spent in each situation
-        .groupby("situation_code")
-        .agg(
-            time_on_ice=("time_on_ice", "sum"),
-        )
-        .time_on_ice.to_dict()
+    return get_game_id_to_situation_code_to_time(
+        game_ids=np.zeros(len(situation_codes), dtype=np.int64),
+        periods=periods,
+        seconds=seconds,
+        situation_codes=situation_codes,
+    ).get(0, {})
+
+
+def get_game_id_to_situation_code_to_time(
+    game_ids: np.ndarray,
+    periods: np.ndarray,
+    seconds: np.ndarray,
+    situation_codes: np.ndarray,
+) -> Dict[int, dict]:
+    """Compute the total time spent in each game situation for multiple games at once.
+
+    Events are split into runs of consecutive events of the same game with the same situation code.
+    Each run lasts from its first to its last event, extended by half of the gaps to the neighbouring
+    runs of the same game. Events without a situation code are skipped.
+
+    Parameters:
+    -----------
+    game_ids : np.ndarray
+        An array with the game ID of each event, events of a game must be consecutive.
+    periods : np.ndarray
+        An array with the period of each event.
+    seconds : np.ndarray
+        An array with the seconds elapsed in period of each event.
+    situation_codes : np.ndarray
+        An array with the situation code of each event.
+
+    Returns:
+    --------
+    Dict[int, dict]
+        A dictionary mapping game ID to a dictionary mapping situation code to the total time,
+        with situation codes sorted.
+    """
+    if len(situation_codes) == 0:
+        return {}
+
+    # compute time in game, and split events into runs of the same situation
+    time_in_game = 60 * 20 * (periods - 1) + seconds
+    is_missing = np.equal(situation_codes, None)
+    is_run_start = np.ones(len(situation_codes), dtype=bool)
+    is_run_start[1:] = (
+        (situation_codes[1:] != situation_codes[:-1])
+        | (game_ids[1:] != game_ids[:-1])
+        | is_missing[1:]
+        | is_missing[:-1]
     )
+    run_start_i = np.flatnonzero(is_run_start & ~is_missing)
+
+    if len(run_start_i) == 0:
+        return {}
+
+    # determine the start and end time of each situation
+    run_game_ids = game_ids[run_start_i]
+    run_situation_codes = situation_codes[run_start_i]
+    run_bounds_i = np.flatnonzero(is_run_start)
+    run_start = np.minimum.reduceat(time_in_game, run_bounds_i)[~is_missing[run_bounds_i]]
+    run_end = np.maximum.reduceat(time_in_game, run_bounds_i)[~is_missing[run_bounds_i]]
+
+    # adjust for gaps in time between situations of the same game
+    is_same_game_as_previous = np.zeros(len(run_start_i), dtype=bool)
+    is_same_game_as_previous[1:] = run_game_ids[1:] == run_game_ids[:-1]
+    run_start_correction = np.zeros(len(run_start_i))
+    run_start_correction[1:] = (run_start[1:] - run_end[:-1]) / 2
+    run_end_correction = np.zeros(len(run_start_i))
+    run_end_correction[:-1] = (run_start[1:] - run_end[:-1]) / 2
+    run_start_correction[~is_same_game_as_previous] = 0
+    run_end_correction[np.append(~is_same_game_as_previous[1:], True)] = 0
+    time_on_ice = (run_end + run_end_correction) - (run_start - run_start_correction)
+
+    # aggregate total time spent in each situation of each game
+    game_id_values, game_id_i = np.unique(run_game_ids, return_inverse=True)
+    situation_code_values, situation_code_i = np.unique(run_situation_codes.astype(str), return_inverse=True)
+    group_i = game_id_i * len(situation_code_values) + situation_code_i
+    group_values, group_i = np.unique(group_i, return_inverse=True)
+    group_time_on_ice = np.bincount(group_i, weights=time_on_ice)
+
+    game_id_to_situation_code_to_time = {}
+    for group, time in zip(group_values.tolist(), group_time_on_ice.tolist()):
+        game_id = game_id_values[group // len(situation_code_values)].item()
+        situation_code = situation_code_values[group % len(situation_code_values)].item()
+        game_id_to_situation_code_to_time.setdefault(game_id, {})[situation_code] = time
+
+    return game_id_to_situation_code_to_time
@@ -18,6 +18,8 @@ class Transform(Stack):
     """Stack used for dbt transformation."""
 
     frequency_cron_transform = {"minute": "15", "hour": "7"}
+    frequency_cron_train_xg_model = {"minute": "15", "hour": "6", "week_day": "MON"}
+    command_train_xg_model = ["dbt", "run", "--target", "prod", "--select", "tag:xg_training"]
     task_cpu = "1024"
     task_memory_mib = "2048"
 
@@ -107,7 +109,7 @@ class Transform(Stack):
         )
 
         # add the docker container to the task
-        task.add_container(
+        container = task.add_container(
             id="ECSContainerTransform",
             container_name=get_name("ecs-container-transform"),
             image=aws_ecs.ContainerImage.from_docker_image_asset(asset=self.image),
@@ -129,4 +131,25 @@ class Transform(Stack):
             )
         )
 
+        # schedule training of xG model, it runs the same task with the training command
+        train_xg_model_rule = aws_events.Rule(
+            self,
+            id="TrainXgModelScheduleRule",
+            rule_name=get_name("rule-train-xg-model"),
+            schedule=aws_events.Schedule.cron(**self.frequency_cron_train_xg_model),
+        )
+        train_xg_model_rule.add_target(
+            target=aws_events_targets.EcsTask(
+                cluster=self.cluster,
+                task_definition=task,
+                subnet_selection=aws_ec2.SubnetSelection(subnet_type=aws_ec2.SubnetType.PUBLIC),
+                container_overrides=[
+                    aws_events_targets.ContainerOverride(
+                        container_name=container.container_name,
+                        command=self.command_train_xg_model,
+                    )
+                ],
+            )
+        )
+
         return task
@@ -1,12 +1,14 @@
 with base as (
 
-    select * from {{ source("base", "games") }}
+    select * exclude (filename) from {{ source("base", "games") }}
 
 ),
 
+-- games stored again, e.g. corrected or finished after live ingestion, are taken from base only
 base_incremental as (
 
     select * from {{ source("base_incremental", "games") }}
+    where id not in (select id from base)
 
 )
 
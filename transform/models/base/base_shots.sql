@@ -1,12 +1,23 @@
-with base as (
+with base_files as (
 
     select * from {{ source("base", "shots") }}
 
 ),
 
+-- live increments of a game are used only until the final file of the game is stored
+base as (
+
+    select * exclude (filename) from base_files
+    where filename not like '%-live-%'
+        or game_id not in (select game_id from base_files where filename not like '%-live-%')
+
+),
+
+-- games stored again, e.g. corrected or finished after live ingestion, are taken from base only
 base_incremental as (
 
     select * from {{ source("base_incremental", "shots") }}
+    where game_id not in (select game_id from base)
 
 )
 
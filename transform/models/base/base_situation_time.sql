@@ -1,12 +1,14 @@
 with base as (
 
-    select * from {{ source("base", "situation-time") }}
+    select * exclude (filename) from {{ source("base", "situation-time") }}
 
 ),
 
+-- games stored again, e.g. corrected or finished after live ingestion, are taken from base only
 base_incremental as (
 
     select * from {{ source("base_incremental", "situation_time") }}
+    where game_id not in (select game_id from base)
 
 )
 
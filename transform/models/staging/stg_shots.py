@@ -1,4 +1,11 @@
-import pandas as pd
+from typing import Optional
+
+import duckdb
+
+from utils.xg import get_grid_cell, get_normalized_coordinate, train_xg_model
+
+# shots are scored again only if their coordinates, or their type changed since they were scored
+SCORED_SHOTS_KEYS = ["game_id", "id", "event_type", "x_coord_norm", "y_coord_norm"]
 
 COLS_TO_KEEP = [
     "game_id",
@@ -18,7 +25,7 @@ COLS_TO_KEEP = [
     "y_coord",
     "x_coord_norm",
     "y_coord_norm",
-    "coords_combination",
+    "coords_cell",
     "zone_code",
     "event_owner_team_id",
     "shot_type",
@@ -29,6 +36,8 @@ COLS_TO_KEEP = [
     "blocking_player_id",
     "missed_shot_reason",
     "xg",
+    "xg_model_version",
+    "xg_model_trained_at",
     "is_fenwick",
     "is_from_own_half",
 ]
@@ -37,68 +46,114 @@ COLS_TO_KEEP = [
 def model(dbt, session):
     # configure the model
     dbt.config(materialized="external")
+    xg_model_version = int(dbt.config.get("xg_model_version"))
 
-    # get shots data
-    df = dbt.ref("base_shots").df()
+    # get shots data, shots are transformed as a DuckDB relation, so they are never copied into pandas
+    base_shots = dbt.ref("base_shots")
 
     # add new columns
-    df["season"] = df.game_id.astype(str).str[:4].astype(int)
-    df["season_type"] = df.game_id.astype(str).str[5].astype(int)
-    df["x_coord_norm"] = get_normalized_coordinate(df=df, coord_type="x")
-    df["y_coord_norm"] = get_normalized_coordinate(df=df, coord_type="y")
-    df["coords_combination"] = get_combination(df=df, cols=["x_coord_norm", "y_coord_norm"])
-    df["is_fenwick"] = df.event_type != "blocked-shot"
-    df["is_from_own_half"] = df.x_coord_norm >= 0
-
-    # add xG column
-    xg_model = get_xg_model(df=df)
-    xg_filter = (df.is_fenwick) & (df.is_from_own_half)
-    df.loc[xg_filter, "xg"] = df.loc[xg_filter, "coords_combination"].map(xg_model)
+    shots = base_shots.project(
+        f"""
+        *,
+        substring(game_id::varchar, 1, 4)::int as season,
+        substring(game_id::varchar, 6, 1)::int as season_type,
+        {get_normalized_coordinate(coord_type="x")} as x_coord_norm,
+        {get_normalized_coordinate(coord_type="y")} as y_coord_norm,
+        event_type is distinct from 'blocked-shot' as is_fenwick
+        """
+    )
+    shots = shots.project(
+        f"""
+        *,
+        {get_grid_cell(x="x_coord_norm", y="y_coord_norm")} as coords_cell,
+        coalesce(x_coord_norm >= 0, false) as is_from_own_half
+        """
+    )
+
+    # add xG column, shots scored by the same xG model in previous runs keep their xG
+    xg_model = read_xg_model(
+        session=session,
+        location=dbt.config.get("xg_model_location"),
+        shots=base_shots,
+        seasons_cnt=int(dbt.config.get("xg_model_seasons_cnt")),
+    )
+    xg_model_trained_at = get_trained_at(xg_model=xg_model)
+    shots = shots.set_alias("shots").join(
+        xg_model.set_alias("xg_model"), "shots.coords_cell = xg_model.coords_cell", how="left"
+    )
+    xg = "case when shots.is_fenwick and shots.is_from_own_half then xg_model.xg end"
+
+    scored_shots = get_scored_shots(
+        session=session,
+        location=dbt.config.get("scored_shots_location"),
+        xg_model_version=xg_model_version,
+        xg_model_trained_at=xg_model_trained_at,
+    )
+    if scored_shots is not None:
+        shots = shots.join(
+            scored_shots.set_alias("scored_shots"),
+            " and ".join(f"shots.{key} is not distinct from scored_shots.{key}" for key in SCORED_SHOTS_KEYS),
+            how="left",
+        )
+        xg = f"case when scored_shots.game_id is not null then scored_shots.xg else {xg} end"
 
     # filter out columns that are not needed
-    df = df.loc[:, COLS_TO_KEEP]
+    col_to_expression = {
+        "xg": xg,
+        "xg_model_version": f"{xg_model_version}::int",
+        "xg_model_trained_at": f"'{xg_model_trained_at}'::timestamptz" if xg_model_trained_at else "null::timestamptz",
+    }
+
+    return shots.project(
+        ", ".join(f"{col_to_expression.get(col, f'shots.{col}')} as {col}" for col in COLS_TO_KEEP)
+    )
 
-    return df
 
+def read_xg_model(
+    session, location: str, shots: duckdb.DuckDBPyRelation, seasons_cnt: int
+) -> duckdb.DuckDBPyRelation:
+    """Read xG model trained by the `stg_xg_model` model.
 
-def get_normalized_coordinate(df: pd.DataFrame, coord_type: str) -> pd.Series:
-    def normalize_coordinate(row: dict, coord_type: str) -> int:
-        home_team_defending_side = row["home_team_defending_side"]
-        home_team_id = row["home_team_id"]
-        event_owner_team_id = row["event_owner_team_id"]
-        coord = row[f"{coord_type}_coord"]
+    The model is trained on the base shots and stored first, if it does not exist yet, e.g. after the first
+    deployment, or after the model version is bumped, so the daily run does not wait for the weekly training.
+    """
+    if not session.sql(f"select count(*) from glob('{location}')").fetchone()[0]:
+        train_xg_model(shots=shots, seasons_cnt=seasons_cnt).write_parquet(location)
 
-        if (home_team_defending_side == "left" and home_team_id != event_owner_team_id) or (
-            home_team_defending_side == "right" and home_team_id == event_owner_team_id
-        ):
-            return coord * (-1)
+    return session.sql(f"select * from read_parquet('{location}')")
 
-        return coord
 
-    return df.apply(lambda row: normalize_coordinate(row=row, coord_type=coord_type), axis=1)
+def get_trained_at(xg_model: duckdb.DuckDBPyRelation) -> Optional[str]:
+    """Get the training time identifying xG model, None for models trained before it was recorded."""
+    if "trained_at" not in xg_model.columns:
+        return None
 
+    trained_at = xg_model.aggregate("max(trained_at)").fetchone()[0]
 
-def get_combination(df: pd.DataFrame, cols: list, sep: str = ",") -> pd.Series:
-    """Create a text combination of `cols`, separetad by `sep`."""
-    return df.loc[:, cols].astype(str).apply(sep.join, axis=1)
+    return trained_at.isoformat() if trained_at else None
 
 
-def get_xg_model(df: pd.DataFrame, min_shots_cnt: int = 10) -> dict:
-    """Get xG model."""
-    return (
-        df
-        # apply filters
-        .loc[(df.is_fenwick) & (df.is_from_own_half)]
-        # group by coordinates combination
-        .groupby(by=["coords_combination"])
-        # compute shots, goals and xG values
-        .agg(
-            shots_cnt=("event_type", "count"),
-            goals_cnt=("event_type", lambda x: x.eq("goal").sum()),
-            xg=("event_type", lambda x: x.eq("goal").mean()),
-        )
-        # filter out rows with insignificant value
-        .query(f"shots_cnt > {min_shots_cnt}")
-        # save coordinates to xG value mapping
-        .xg.to_dict()
+def get_scored_shots(
+    session, location: str, xg_model_version: int, xg_model_trained_at: Optional[str]
+) -> Optional[duckdb.DuckDBPyRelation]:
+    """Get xG of shots scored by the xG model in previous runs, None if no shots were scored by it yet.
+
+    The model is identified by its version and its training time, so all shots are scored again
+    whenever the model is retrained.
+    """
+    if xg_model_trained_at is None or not session.sql(f"select count(*) from glob('{location}')").fetchone()[0]:
+        return None
+
+    if "xg_model_trained_at" not in session.sql(f"select * from read_parquet('{location}')").columns:
+        return None
+
+    keys = ", ".join(SCORED_SHOTS_KEYS)
+
+    return session.sql(
+        f"""
+        select distinct on ({keys}) {keys}, xg
+        from read_parquet('{location}')
+        where xg_model_version = {xg_model_version}
+            and xg_model_trained_at = '{xg_model_trained_at}'::timestamptz
+        """
     )
@@ -0,0 +1,10 @@
+from utils.xg import train_xg_model
+
+
+def model(dbt, session):
+    # configure the model, the model is trained separately from daily runs into a versioned location
+    dbt.config(materialized="external")
+    seasons_cnt = int(dbt.config.get("seasons_cnt"))
+
+    # train xG model, all stored base shots are loaded from the last run
+    return train_xg_model(shots=dbt.source("base_incremental", "shots"), seasons_cnt=seasons_cnt)
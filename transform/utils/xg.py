@@ -0,0 +1,123 @@
+"""Grid based expected goals (xG) model.
+
+The rink is divided into a grid of cells of integer normalized coordinates. The xG value of a cell is
+the share of goals among the fenwick shots from the cell, computed over the shots of the training seasons.
+Shots are encoded and scored by DuckDB expressions, so they never leave DuckDB.
+"""
+
+import duckdb
+
+# rink grid of normalized coordinates, a shot is located in the cell of its integer coordinates
+X_COORD_MIN, X_COORD_MAX = -100, 100
+Y_COORD_MIN, Y_COORD_MAX = -43, 43
+GRID_X_SIZE = X_COORD_MAX - X_COORD_MIN + 1
+GRID_Y_SIZE = Y_COORD_MAX - Y_COORD_MIN + 1
+GRID_SIZE = GRID_X_SIZE * GRID_Y_SIZE
+
+
+def get_normalized_coordinate(coord_type: str) -> str:
+    """Get an expression of `coord_type` coordinate normalized, so all shots are directed to the same side."""
+    return f"""
+        case
+            when (home_team_defending_side = 'left' and home_team_id is distinct from event_owner_team_id)
+                or (home_team_defending_side = 'right' and home_team_id = event_owner_team_id)
+            then -{coord_type}_coord
+            else {coord_type}_coord
+        end
+    """
+
+
+def get_grid_cell(x: str, y: str) -> str:
+    """Get an expression of an integer index of the rink grid cell of coordinates, -1 outside the grid."""
+    return f"""
+        case
+            when {x} between {X_COORD_MIN} and {X_COORD_MAX} and {y} between {Y_COORD_MIN} and {Y_COORD_MAX}
+            then (trunc({x}::double)::bigint - ({X_COORD_MIN})) * {GRID_Y_SIZE}
+                + (trunc({y}::double)::bigint - ({Y_COORD_MIN}))
+            else -1
+        end
+    """
+
+
+def fit_xg_model(shots: duckdb.DuckDBPyRelation, min_shots_cnt: int = 10) -> duckdb.DuckDBPyRelation:
+    """Fit xG model on shots, a table of shots, goals, and xG values of grid cells with at least one shot.
+
+    Parameters:
+    -----------
+    shots : duckdb.DuckDBPyRelation
+        A relation of shots with `coords_cell`, `event_type`, `is_fenwick`, and `is_from_own_half` columns.
+    min_shots_cnt : int, optional
+        A number of shots a cell has to exceed to have a significant xG value. Defaults to 10.
+
+    Returns:
+    --------
+    duckdb.DuckDBPyRelation
+        A relation with `coords_cell`, `shots_cnt`, `goals_cnt`, and `xg` columns, `xg` is NULL for cells
+        with insignificant value.
+    """
+    return (
+        shots.filter("is_fenwick and is_from_own_half and coords_cell >= 0")
+        .aggregate(
+            f"""
+            coords_cell,
+            count(*) as shots_cnt,
+            count(*) filter (where event_type = 'goal') as goals_cnt,
+            case when count(*) > {min_shots_cnt} then goals_cnt / shots_cnt end as xg
+            """,
+            "coords_cell",
+        )
+        .order("coords_cell")
+    )
+
+
+def train_xg_model(shots: duckdb.DuckDBPyRelation, seasons_cnt: int) -> duckdb.DuckDBPyRelation:
+    """Train xG model on fenwick shots of the last seasons.
+
+    Parameters:
+    -----------
+    shots : duckdb.DuckDBPyRelation
+        A relation of base shots.
+    seasons_cnt : int
+        A number of the last seasons xG model is trained on.
+
+    Returns:
+    --------
+    duckdb.DuckDBPyRelation
+        A relation of xG model as returned by `fit_xg_model`, with the first and the last training season,
+        and the training time identifying the model. The model is empty if there are no shots.
+    """
+    shots = shots.filter("event_type is distinct from 'blocked-shot'")
+    last_season = shots.aggregate("max(game_id // 1000000)").fetchone()[0]
+
+    if last_season is None:
+        first_season = last_season = "null"
+    else:
+        first_season = last_season - seasons_cnt + 1
+        shots = shots.filter(f"game_id // 1000000 >= {first_season}")
+
+    # add new columns
+    shots = shots.project(
+        f"""
+        event_type,
+        {get_normalized_coordinate(coord_type="x")} as x_coord_norm,
+        {get_normalized_coordinate(coord_type="y")} as y_coord_norm
+        """
+    )
+    shots = shots.project(
+        f"""
+        event_type,
+        {get_grid_cell(x="x_coord_norm", y="y_coord_norm")} as coords_cell,
+        true as is_fenwick,
+        coalesce(x_coord_norm >= 0, false) as is_from_own_half
+        """
+    )
+
+    # fit xG model, the training time identifies the model, as the model version is retrained regularly
+    return fit_xg_model(shots=shots).project(
+        f"""
+        *,
+        {first_season}::int as first_season,
+        {last_season}::int as last_season,
+        current_timestamp as trained_at
+        """
+    )